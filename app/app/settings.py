@@ -148,6 +148,50 @@ LOGIN_REDIRECT_URL = 'dictionary:list_of_dictionaries'
 LOGIN_URL = 'login'
 LOGOUT_URL = 'logout'
 
+# number of dictionaries loaded by one step of infinite scroll
+DICTIONARY_PAGE_SIZE = 10
+
+# results of dictionary search are cached in files shared by all
+# processes on the host (web workers and import worker), so version
+# bumped by one process invalidates results in all of them; a cache
+# local to process isn't enough when there is more than one process,
+# least recently used entries are culled over MAX_ENTRIES
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND': 'dictionary.cache.LRUFileBasedCache',
+        'LOCATION': os.environ.get(
+            'SEARCH_CACHE_LOCATION', '/vol/web/cache/search'
+        ),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# in-process prefix index of words for autocomplete of search,
+# limit of keys and seconds before it's rebuilt from DB
+AUTOCOMPLETE_INDEX_SIZE = 500000
+AUTOCOMPLETE_INDEX_TTL = 300
+
+# lessons of dictionaries with at least this number of words are lazy,
+# their cards are created only when student answers or changes status
+LESSON_LAZY_WORD_COUNT = 1000
+
+# running import job whose progress wasn't saved for this number of
+# seconds is considered abandoned by dead worker and is taken again,
+# it must be longer than linking of words of the largest dictionary
+IMPORT_JOB_TIMEOUT = 900
+
+# limits of zip archives of dictionaries checked before unpacking:
+# size of one dictionary file, number of files and their total size
+ARCHIVE_MEMBER_MAX_SIZE = 100 * 1024 * 1024
+ARCHIVE_MAX_MEMBERS = 100
+ARCHIVE_MAX_TOTAL_SIZE = 500 * 1024 * 1024
+
 
 MESSAGE_TAGS = {
     message_constants.DEBUG: 'debug',
@@ -161,4 +205,9 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+FILE_UPLOAD_HANDLERS = [
+    'dictionary.uploadhandlers.HashingMemoryFileUploadHandler',
+    'dictionary.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
 FIXTURE_DIRS = (os.path.join(BASE_DIR, 'core/tests/sample_file/fixtures'),)
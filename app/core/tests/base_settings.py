@@ -6,10 +6,19 @@ from django.contrib.auth import get_user_model
 
 from django.test import TestCase
 from django.test import Client
+from django.test import override_settings
 
 from dictionary.models import Word, Dictionary
 
 
+# tests must not clear or fill search cache of the app on the host
+@override_settings(CACHES={
+    **settings.CACHES,
+    'search': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search-tests',
+    },
+})
 class BaseTestSettings(TestCase):
     """
     Base settings for all view tests
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Dictionary, Word
+from .models import Dictionary, ImportJob, Word
 
 
 class DictionaryAdmin(admin.ModelAdmin):
@@ -18,3 +18,14 @@ class WordAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Word, WordAdmin)
+
+
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'file', 'author', 'status', 'cards_parsed', 'cards_inserted',
+        'created', 'updated'
+    )
+    list_filter = ('status',)
+
+
+admin.site.register(ImportJob, ImportJobAdmin)
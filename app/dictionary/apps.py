@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """
+    Recreate full-text index after migrate, only while migration
+    creating it is applied, so it isn't back after migrating backwards
+    """
+    connection = connections[using]
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ('dictionary', '0008_search_index') not in applied:
+        return
+    from dictionary.search import create_search_index
+    with connection.schema_editor() as schema_editor:
+        create_search_index(schema_editor)
 
 
 class DictionaryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dictionary'
+
+    def ready(self):
+        from dictionary import signals  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
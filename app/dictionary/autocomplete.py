@@ -0,0 +1,193 @@
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from dictionary.models import Dictionary, Word
+
+
+class PrefixIndex:
+    """
+    In-process index for typeahead: sorted array of lowercased
+    bodies and translations of words of public dictionaries:
+        - it's built from DB on the first query and rebuilt lazily
+        on the next query after it was marked stale or became older
+        than ttl (words imported by other processes)
+        - words linked to public dictionaries are added by signals,
+        so usually no rebuild is needed after import
+        - number of keys is limited by max_size, words over the limit
+        are not suggested until rebuild
+    Index is shared by threads of the process: arrays are never
+    changed in place, new ones are built aside and swapped in as one
+    tuple, so readers don't take locks and always see arrays of the
+    same version, only one thread rebuilds index at a time
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        # taken to swap arrays
+        self.lock = threading.Lock()
+        # taken by the thread rebuilding index
+        self.rebuild_lock = threading.Lock()
+        self.arrays = ([], [])
+        self.built = None
+        self.stale = True
+
+    def load(self):
+        """
+        Return (key, (body, translations)) of words of public
+        dictionaries, at most max_size keys
+        """
+        public = Dictionary.word.through.objects.filter(
+            word=OuterRef('pk'), dictionary__status='public'
+        )
+        rows = Word.objects\
+            .filter(Exists(public))\
+            .order_by('pk')\
+            .values_list('body', 'translations')\
+            .iterator()
+        pairs = []
+        for body, translations in rows:
+            pairs.extend(self.make_pairs(body, translations))
+            if len(pairs) >= self.max_size:
+                break
+        return pairs[:self.max_size]
+
+    @staticmethod
+    def make_pairs(body, translations):
+        entry = (body, translations)
+        return [(body.lower(), entry), (translations.lower(), entry)]
+
+    def rebuild(self):
+        # marks made during loading are kept for the next rebuild
+        self.stale = False
+        pairs = sorted(self.load())
+        arrays = (
+            [key for key, _ in pairs],
+            [entry for _, entry in pairs],
+        )
+        with self.lock:
+            self.arrays = arrays
+            self.built = time.monotonic()
+
+    def is_expired(self):
+        if self.stale or self.built is None:
+            return True
+        return time.monotonic() - self.built > self.ttl
+
+    def refresh(self):
+        """
+        Rebuild expired index, while one thread rebuilds it others
+        use the previous version, they wait only for the first build
+        """
+        if not self.is_expired():
+            return
+        if self.built is None:
+            with self.rebuild_lock:
+                if self.built is None:
+                    self.rebuild()
+        elif self.rebuild_lock.acquire(blocking=False):
+            try:
+                self.rebuild()
+            finally:
+                self.rebuild_lock.release()
+
+    @staticmethod
+    def merge(arrays, pairs, limit):
+        """
+        Return new arrays with sorted pairs inserted, pairs already
+        in arrays are skipped, at most limit pairs are inserted,
+        unchanged runs are copied by slices
+        """
+        keys, entries = arrays
+        new_keys, new_entries = [], []
+        start = 0
+        for key, entry in pairs:
+            if limit <= 0:
+                break
+            position = bisect.bisect_left(keys, key, start)
+            new_keys += keys[start:position]
+            new_entries += entries[start:position]
+            start = position
+            same = position
+            while same < len(keys) and keys[same] == key:
+                if entries[same] == entry:
+                    break
+                same += 1
+            else:
+                if new_keys[-1:] == [key] and new_entries[-1] == entry:
+                    continue
+                new_keys.append(key)
+                new_entries.append(entry)
+                limit -= 1
+        new_keys += keys[start:]
+        new_entries += entries[start:]
+        return new_keys, new_entries
+
+    def add(self, words):
+        """
+        Add (body, translations) of words to built index, arrays are
+        merged without lock and swapped if nobody swapped them meanwhile
+        """
+        pairs = sorted(
+            pair
+            for body, translations in words
+            for pair in self.make_pairs(body, translations)
+        )
+        while self.built is not None:
+            arrays = self.arrays
+            limit = self.max_size - len(arrays[0])
+            if limit <= 0:
+                return
+            merged = self.merge(arrays, pairs, limit)
+            with self.lock:
+                if self.arrays is arrays:
+                    self.arrays = merged
+                    return
+
+    def mark_stale(self):
+        self.stale = True
+
+    def search(self, prefix, limit):
+        """
+        Return at most limit distinct (body, translations) of words
+        whose body or translations start with prefix
+        """
+        self.refresh()
+        prefix = prefix.lower()
+        keys, entries = self.arrays
+        position = bisect.bisect_left(keys, prefix)
+        results = {}
+        while position < len(keys) and len(results) < limit:
+            if not keys[position].startswith(prefix):
+                break
+            results.setdefault(entries[position], None)
+            position += 1
+        return list(results)
+
+
+index = PrefixIndex(
+    max_size=settings.AUTOCOMPLETE_INDEX_SIZE,
+    ttl=settings.AUTOCOMPLETE_INDEX_TTL,
+)
+
+
+def add_linked_words(dictionary, word_ids):
+    """
+    Add words linked to public dictionary to index after commit,
+    nothing is loaded if index isn't built in this process
+    """
+    if dictionary.status != 'public' or index.built is None:
+        return
+    word_ids = list(word_ids)
+
+    def add():
+        index.add(
+            Word.objects
+            .filter(pk__in=word_ids)
+            .values_list('body', 'translations')
+        )
+    transaction.on_commit(add)
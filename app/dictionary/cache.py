@@ -0,0 +1,51 @@
+import os
+
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """
+    File-based cache shared by processes of the host, which evicts
+    least recently used entries instead of random ones:
+        - hit of entry updates mtime of its file, expiration is kept
+        inside the file, so it isn't changed by that
+        - when MAX_ENTRIES is reached, 1/CULL_FREQUENCY of entries
+        with the oldest mtime are deleted
+        - directory is created by the first set(), not when cache
+        is configured, so tests and commands which don't write to
+        the cache don't need it
+    """
+    _missing = object()
+
+    def __init__(self, dir, params):
+        BaseCache.__init__(self, params)
+        self._dir = os.path.abspath(dir)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        if value is self._missing:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except FileNotFoundError:
+            # deleted by other process after it was read
+            pass
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        used = []
+        for fname in filelist:
+            try:
+                used.append((os.path.getmtime(fname), fname))
+            except FileNotFoundError:
+                continue
+        used.sort()
+        for _, fname in used[:num_entries // self._cull_frequency]:
+            self._delete(fname)
@@ -1,8 +1,8 @@
 from django.contrib import messages
 from django.shortcuts import redirect
 
-from lesson.models import Lesson
-from .models import Dictionary
+from .loaders import get_loader
+from .permissions import can_learn, is_author
 from django.http import HttpResponseBadRequest
 
 
@@ -19,8 +19,8 @@ def ajax_required(f):
 def author_required(f):
     def wrap(request, *args, **kwargs):
         dictionary_pk = request.POST.get('dictionary_pk')
-        author = Dictionary.objects.get(pk=dictionary_pk).author
-        if author != request.user:
+        dictionary = get_loader(request).dictionary(dictionary_pk)
+        if not is_author(request.user, dictionary):
             messages.error(
                 request,
                 'Вы не являетесь автором этого словаря. '
@@ -38,28 +38,13 @@ def available_for_learning(f):
     Decorator checks if dictionary is public or user is its author
     """
     def wrap(request, *args, **kwargs):
-        dictionary_pk = kwargs.get('dictionary_pk')
-        lesson_pk = kwargs.get('lesson_pk')
-        if dictionary_pk:
-            dictionary = Dictionary.objects\
-                .select_related('author')\
-                .get(pk=dictionary_pk)
+        loader = get_loader(request)
+        if kwargs.get('dictionary_pk'):
+            dictionary = loader.dictionary(kwargs['dictionary_pk'])
         else:
-            dictionary = Lesson.objects\
-                .select_related('dictionary',
-                                'dictionary__author')\
-                .get(pk=lesson_pk).dictionary
-        if not (
-            (
-                request.user == dictionary.author
-            ) or (
-                (
-                    dictionary.status == 'public'
-                ) and (
-                request.user in dictionary.student.all()
-                )
-            )
-        ):
+            lesson = loader.lesson(kwargs.get('lesson_pk'))
+            dictionary = lesson and lesson.dictionary
+        if not can_learn(request.user, dictionary):
             messages.error(request, 'Автор словаря ограничил доступ к нему')
             return redirect('dictionary:my_dictionaries')
         return f(request, *args, **kwargs)
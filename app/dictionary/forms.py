@@ -4,8 +4,8 @@ from django.core.exceptions import ValidationError
 
 from django.core.validators import FileExtensionValidator
 
-from .helpers import DictionaryFileManager
-from .models import Dictionary
+from .helpers import ArchiveManager, DictionaryFileManager
+from .models import Dictionary, ImportJob
 
 
 class ChoiceDictionaryForm(forms.Form):
@@ -16,6 +16,38 @@ class ChoiceDictionaryForm(forms.Form):
     )
 
 
+class ReplaceFileForm(ChoiceDictionaryForm):
+    """
+    Form for uploading a new version of file of existing dictionary
+    """
+    file = forms.FileField(
+        label='',
+        validators=[FileExtensionValidator(
+            allowed_extensions=['xml', 'csv', ],
+        )],
+        error_messages={
+            'invalid_extension': 'Допустимые расширения словарей "xml" и "csv"'
+        },
+    )
+
+    def clean_file(self):
+        """
+        File is parsed here, cards are kept by manager to be
+        compared with words of dictionary in save(), so the file
+        is parsed once
+        """
+        uploaded_file = self.cleaned_data.get('file')
+        self.file_manager = DictionaryFileManager(uploaded_file)
+        if self.file_manager.read_cards():
+            return uploaded_file
+        raise ValidationError("Загруженный файл не был распознан")
+
+    def save(self):
+        return self.file_manager.replace_words(
+            self.cleaned_data['dictionary_pk']
+        )
+
+
 class DictionaryForm(forms.ModelForm):
     """
     Form for uploading a new xml-dictionary
@@ -28,6 +60,10 @@ class DictionaryForm(forms.ModelForm):
             'invalid_extension': 'Допустимые расширения словарей "xml" и "csv"'
         },
     )
+    background = forms.BooleanField(
+        required=False,
+        label='Загрузить в фоновом режиме',
+    )
 
     def __init__(self, *args, **kwargs):
         """
@@ -38,11 +74,15 @@ class DictionaryForm(forms.ModelForm):
 
     def clean_file(self):
         """
-        Method to avoid files which can't be parsed afterwards
-        due to unknown structure
+        File isn't parsed here, save() validates and saves it in one
+        streaming pass and returns None for unrecognized file
         """
         uploaded_file = self.cleaned_data.get('file')
-        if DictionaryFileManager(uploaded_file).clean_file():
+        if self.cleaned_data.get('background'):
+            # file is validated by the import job
+            return uploaded_file
+        self.file_manager = DictionaryFileManager(uploaded_file)
+        if self.file_manager.get_handler():
             return uploaded_file
         raise ValidationError("Загруженный файл не был распознан")
 
@@ -55,13 +95,28 @@ class DictionaryForm(forms.ModelForm):
 
         obj = super().save(False)
         obj.author = self.author
-        uploaded_file = self.cleaned_data.get('file')
-        obj = DictionaryFileManager(uploaded_file).parse_file(obj)
+        obj = self.file_manager.parse_file(obj)
+        if obj is None:
+            self.add_error('file', 'Загруженный файл не был распознан')
         return obj
 
+    def save_job(self):
+        """
+        Queuing uploaded file to be imported by process_import_jobs
+        """
+        cd = self.cleaned_data
+        return ImportJob.objects.create(
+            author=self.author,
+            file=cd['file'],
+            file_hash=getattr(cd['file'], 'content_hash', ''),
+            note=cd['note'],
+            dictionary_status=cd['status'],
+        )
+
     class Meta:
         model = Dictionary
-        fields = ['author', 'note', 'status', 'file']
+        # background goes before file to be cleaned first
+        fields = ['author', 'note', 'status', 'background', 'file']
         labels = {
             'note': 'Примечания',
             'file': '',
@@ -74,5 +129,60 @@ class DictionaryForm(forms.ModelForm):
         required = ('file', )
 
 
+class ArchiveForm(forms.Form):
+    """
+    Form for uploading zip archive of xml and csv dictionaries
+    """
+    archive = forms.FileField(
+        label='',
+        validators=[FileExtensionValidator(
+            allowed_extensions=['zip', ],
+        )],
+        error_messages={
+            'invalid_extension': 'Допустимое расширение архива "zip"'
+        },
+    )
+    note = forms.CharField(
+        label='Примечания',
+        max_length=500,
+        required=False,
+        widget=forms.Textarea(attrs={"class": "form-control", "rows": 5}),
+    )
+    status = forms.ChoiceField(
+        label='',
+        choices=Dictionary.STATUS_CHOICES,
+        initial='private',
+    )
+
+    def clean_archive(self):
+        """
+        Method to avoid archives without dictionaries, archive
+        manager raises ValidationError for archives over limits
+        """
+        archive = self.cleaned_data.get('archive')
+        self.archive_manager = ArchiveManager(archive)
+        if self.archive_manager.clean_archive():
+            return archive
+        raise ValidationError("В архиве не найдено словарей")
+
+    def save(self, author):
+        cd = self.cleaned_data
+        return self.archive_manager.import_archive(
+            author=author,
+            note=cd['note'],
+            status=cd['status'],
+        )
+
+
 class SearchForm(forms.Form):
-    query = forms.CharField(label='')
+    query = forms.CharField(
+        label='',
+        widget=forms.TextInput(attrs={
+            'list': 'autocomplete',
+            'autocomplete': 'off',
+        })
+    )
+    fuzzy = forms.BooleanField(
+        required=False,
+        label='Искать слова с опечатками',
+    )
@@ -1,77 +1,322 @@
+import codecs
+import csv
+import hashlib
+import os
 import xml.etree.ElementTree as ET
+import zipfile
 from _elementtree import ParseError
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict
+from itertools import chain, islice
+from multiprocessing import get_context
 
+import django
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Case, Value, When
 from slugify import slugify
 
-from dictionary.models import Word
+from dictionary.models import Dictionary, Word
+from dictionary.signals import words_linked
+from lesson.models import Card, Lesson
 
 
-class XmlParser:
+class BulkImporter:
+    """
+    Base class for parsers, writes parsed cards to DB in batches:
+        - split cards in chunks of batch_size
+        - resolve words of chunk by content hash: fetch existing
+        canonical words by one query and create missing ones by
+        one bulk_create, so the same word is stored once
+        - link them to the dictionary by one bulk_create into
+        through table of Dictionary.word
+        - everything is done in one transaction, so failed import
+        doesn't leave dictionary half-built
+    canonical_words = False creates a new word for every card
+    """
+    batch_size = 1000
+    canonical_words = True
+
+    def iter_chunks(self, items):
+        items = iter(items)
+        while chunk := list(islice(items, self.batch_size)):
+            yield chunk
+
+    def insert_words(self, cards):
+        """
+        Create or fetch words of cards and return their ids
+        in order of cards
+        """
+        words = [
+            Word(
+                body=body,
+                slug=slugify(body),
+                translations=translations,
+                example=example,
+            )
+            for body, translations, example in cards
+        ]
+        if not self.canonical_words:
+            return [word.pk for word in Word.objects.bulk_create(words)]
+
+        for word in words:
+            word.content_hash = Word.make_content_hash(
+                word.body, word.translations, word.example
+            )
+        hashes = {word.content_hash for word in words}
+        word_ids = dict(
+            Word.objects
+            .filter(content_hash__in=hashes)
+            .values_list('content_hash', 'pk')
+        )
+        missing = {
+            word.content_hash: word for word in words
+            if word.content_hash not in word_ids
+        }
+        if missing:
+            # words inserted by parallel import are skipped and fetched
+            Word.objects.bulk_create(
+                missing.values(), ignore_conflicts=True
+            )
+            word_ids.update(
+                Word.objects
+                .filter(content_hash__in=missing)
+                .values_list('content_hash', 'pk')
+            )
+        return [word_ids[word.content_hash] for word in words]
+
+    def link_words(self, obj, word_ids):
+        through = Dictionary.word.through
+        # the same word can be met several times in file
+        word_ids = list(dict.fromkeys(word_ids))
+        through.objects.bulk_create([
+            through(dictionary_id=obj.pk, word_id=word_id)
+            for word_id in word_ids
+        ], ignore_conflicts=True)
+        words_linked.send(sender=Dictionary, dictionary=obj, word_ids=word_ids)
+
+    @staticmethod
+    def has_cards(cards):
+        """
+        Read cards up to the end without keeping them, to be sure the
+        whole file is valid, return True if there is at least one card
+        """
+        found = False
+        for _ in cards:
+            found = True
+        return found
+
+    def save_dictionary(self, obj, iter_cards):
+        """
+        Save dictionary with words of cards returned by iter_cards(),
+        the file is validated by the same pass:
+            - dictionary is saved before cards are read, saving of
+            its FileField reads the same uploaded file to the end
+            - title is read together with cards, so it's updated last
+            - cards already parsed are taken from self.cards
+            - errors of file and file without cards roll back
+            everything, stored file is deleted
+        """
+        file_name = obj.file.name
+        try:
+            with transaction.atomic():
+                # otherwise can't add many-to-many objects
+                obj.save()
+                cards = iter_cards() if self.cards is None else self.cards
+                found = False
+                for chunk in self.iter_chunks(cards):
+                    found = True
+                    self.link_words(obj, self.insert_words(chunk))
+                if not found:
+                    raise ValueError('File has no cards')
+                # find name of file or set default "Без имени"
+                obj.title = self.title or 'Без имени'
+                obj.slug = slugify(obj.title)
+                # UPDATE without signals, dictionary is already indexed
+                Dictionary.objects.filter(pk=obj.pk)\
+                    .update(title=obj.title, slug=obj.slug)
+                obj.update_counters('word_count')
+        except Exception:
+            # name is changed only if upload was stored by this save
+            if obj.file and obj.file.name != file_name:
+                obj.file.delete(save=False)
+            obj.pk = None
+            raise
+        return obj
+
+
+class XmlParser(BulkImporter):
     """
     Parser uploaded xml dictionaries, to validate file and
     create new dictionary instance:
-        - take parts of file in for-cycle  and add them
-        in byte-string
-        - find title of dictionary-file, create a new
-        instance of dictionary
-        - parse byte-string and find all cards, take words,
-        translations and examples
-        - create new instance of words for each card
-        - assign all new word instances to the created dictionary
+        - stream the file with iterparse, so only one card
+        is kept in memory at a time
+        - find title of dictionary-file in attributes of
+        the root element, create a new instance of dictionary
+        - take word, translations and example of each card
+        and clear the card element right after that
+        - pass cards to BulkImporter to create words
+        and assign them to the created dictionary
     """
+    def iter_xml(self):
+        """
+        Return generator of (body, translations, example) for every
+        card of uploaded file. Title of dictionary is read from the
+        root element before the first card and kept in self.title
+        """
+        self.uploaded_file.seek(0)
+        events = ET.iterparse(self.uploaded_file, events=('start', 'end'))
+        _, root = next(events)
+        self.title = root.attrib.get('title')
+        return self._iter_xml_cards(events, root)
+
+    @staticmethod
+    def _iter_xml_cards(events, root):
+        for event, element in events:
+            if event != 'end' or element.tag != 'card':
+                continue
+            body, translations, example = None, '', ''
+            for word in element.iter('word'):
+                if word.attrib:
+                    body = word.text  # find text of word
+            translation = element.find('.//translations/word')
+            if translation is not None:
+                # find translation of word
+                translations = translation.text or ''
+            for item in element.iter('example'):
+                example = item.text or ''  # find example of word
+            # drop processed card and everything parsed before it
+            root.clear()
+            if body:
+                yield body, translations, example
+
     def xml(self, obj=None):
         try:
-            file = b''
-            for line in self.uploaded_file:
-                file += line
-            tree = ET.ElementTree(ET.fromstring(file))
-            root = tree.getroot()
-            cards = [card for card in root.iter('card')]
             if not obj:
-                return None if not cards else self.uploaded_file
+                # only title is kept, saving streams the file again,
+                # so memory doesn't depend on the size of the file
+                valid = self.has_cards(self.iter_xml())
+                return self.uploaded_file if valid else None
+            return self.save_dictionary(obj, self.iter_xml)
 
-            # find name of file or set default "Без имени"
-            title = root.attrib.get('title', 'Без имени')
-            obj.title = title or 'Без имени'
-            obj.slug = slugify(obj.title)
-            # otherwise can't add many-to-many objects
-            obj.save()
-
-            for card in cards:
-                # need to clean variable from value of previous card
-                example = ''
-                for translations in card.iter('translations'):
-                    # find translation of word
-                    translations = translations.find('word').text
-                for word in card.iter('word'):
-                    if word.attrib:
-                        body = word.text  # find text of word
-                        slug = slugify(body)
-                for example in card.iter('example'):
-                    example = example.text  # find example of word
-
-                # create and save new word in DB
-                new_word = Word.objects.create(
-                    body=body,
-                    slug=slug,
-                    translations=translations,
-                    example=example)
-                new_word.save()
-                obj.word.add(new_word)
-            obj.save()
-            return obj
-
-        except ParseError:
+        # file without cards is ValueError
+        except (ParseError, ValueError):
             return None
 
 
-class CsvParser:
+class CsvParser(BulkImporter):
     """
-    Parser uploaded csv dictionaries.
-    NOT IMPLEMENTED
+    Parser uploaded csv and tsv dictionaries:
+        - guess encoding by BOM of the file (utf-8 and utf-16 like
+        exports of LT), then by first chunk of the file
+        - sniff delimiter on the first chunk of the file
+        - read file by chunks and decode them incrementally,
+        so rows are taken lazily one by one
+        - columns of row: word, translations or word, transcription,
+        translations and optional example
+        - title of dictionary is the name of uploaded file
+        - pass cards to BulkImporter to create words
+        and assign them to the created dictionary
     """
+    chunk_size = 64 * 1024
+    delimiters = ',;\t|'
+    encodings = ('utf-8', 'cp1251')
+    header = ('word', 'слово')
+    boms = (
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    )
+
+    def get_encoding(self, sample):
+        for bom, encoding in self.boms:
+            if sample.startswith(bom):
+                return encoding
+        if b'\x00' in sample:
+            # utf-16 without BOM, zero bytes are high bytes of ascii,
+            # they go after low bytes in little-endian
+            return 'utf-16-le' if sample.index(b'\x00') % 2 else 'utf-16-be'
+        for encoding in self.encodings:
+            try:
+                # chunk can end in the middle of multibyte char
+                codecs.getincrementaldecoder(encoding)().decode(sample)
+            except UnicodeDecodeError:
+                continue
+            return encoding
+        raise UnicodeDecodeError(
+            self.encodings[-1], sample, 0, len(sample), 'unknown encoding'
+        )
+
+    def read_chunks(self):
+        self.uploaded_file.seek(0)
+        return iter(lambda: self.uploaded_file.read(self.chunk_size), b'')
+
+    def iter_lines(self):
+        """
+        Return lines of uploaded file decoded chunk by chunk
+        """
+        chunks = self.read_chunks()
+        first_chunk = next(chunks, b'')
+        decoder = codecs.getincrementaldecoder(
+            self.get_encoding(first_chunk)
+        )()
+        rest = ''
+        for chunk in chain([first_chunk], chunks):
+            lines = (rest + decoder.decode(chunk)).splitlines(True)
+            rest = lines.pop() if lines else ''
+            yield from lines
+        rest += decoder.decode(b'', final=True)
+        if rest:
+            yield rest
+
+    def iter_csv(self):
+        """
+        Return generator of (body, translations, example) for every
+        row of uploaded file. Title of dictionary is kept in self.title
+        """
+        lines = self.iter_lines()
+        first_lines = list(islice(lines, 20))
+        try:
+            dialect = csv.Sniffer().sniff(
+                ''.join(first_lines), delimiters=self.delimiters
+            )
+        except csv.Error:
+            # single column or too few lines to guess
+            dialect = csv.excel_tab if '\t' in ''.join(first_lines) \
+                else csv.excel
+        name = os.path.basename(self.uploaded_file.name)
+        self.title = os.path.splitext(name)[0]
+        rows = csv.reader(chain(first_lines, lines), dialect)
+        return self._iter_csv_cards(rows)
+
+    def _iter_csv_cards(self, rows):
+        for number, row in enumerate(rows):
+            row = [column.strip() for column in row]
+            if len(row) < 2 or not row[0]:
+                continue
+            if number == 0 and row[0].lower() in self.header:
+                continue
+            if len(row) == 2:
+                body, translations = row
+                example = ''
+            else:
+                body, _, translations, *example = row
+                example = example[0] if example else ''
+            yield body, translations, example
+
     def csv(self, obj=None):
-        return None
+        try:
+            if not obj:
+                # only title is kept, see xml()
+                valid = self.has_cards(self.iter_csv())
+                return self.uploaded_file if valid else None
+            return self.save_dictionary(obj, self.iter_csv)
+
+        # UnicodeDecodeError and file without cards are ValueError
+        except (csv.Error, ValueError):
+            return None
 
 
 class DictionaryFileManager(XmlParser, CsvParser):
@@ -79,27 +324,383 @@ class DictionaryFileManager(XmlParser, CsvParser):
     Class responsible to clean and save dictionary uploaded to site.
     get_handler() - dispatch which method should parse file
     clean_file() and parse_file() interfaces provided to form.save()
+    clean_file() validates file without saving it,
+    parse_file() validates and saves file in one streaming pass,
+    so the form doesn't call clean_file() and no cards are kept,
+    invalid file rolls back the dictionary and None is returned
+    read_cards() keeps all cards for those who need them at once,
+    cards already parsed elsewhere (archives) can be set to self.cards
+    files with content imported before aren't parsed at all, new
+    dictionary takes stored file and words of the first one
     """
     allowed_extension = ['xml', 'csv']
 
     def __init__(self, uploaded_file):
         self.uploaded_file = uploaded_file
+        self.title = None
+        self.cards = None
+        self.content_hash = None
+        self.duplicate = None
+
+    def get_content_hash(self):
+        """
+        Return sha256 of file, calculated by upload handler
+        or by reading file if it wasn't uploaded
+        """
+        if not self.content_hash:
+            self.content_hash = getattr(
+                self.uploaded_file, 'content_hash', None
+            )
+        if not self.content_hash:
+            hasher = hashlib.sha256()
+            for chunk in self.read_chunks():
+                hasher.update(chunk)
+            self.content_hash = hasher.hexdigest()
+        return self.content_hash
+
+    def find_duplicate(self):
+        """
+        Return the first dictionary imported from file
+        with the same content
+        """
+        self.duplicate = Dictionary.objects\
+            .filter(file_hash=self.get_content_hash())\
+            .order_by('created')\
+            .first()
+        return self.duplicate
+
+    def copy_dictionary(self, obj, duplicate):
+        """
+        Fill new dictionary by title, stored file and words
+        of the dictionary imported from the same file
+        """
+        obj.title = duplicate.title
+        obj.slug = duplicate.slug
+        obj.file = duplicate.file.name
+        obj.file_hash = duplicate.file_hash
+        word_ids = Dictionary.word.through.objects\
+            .filter(dictionary=duplicate)\
+            .values_list('word_id', flat=True)
+        with transaction.atomic():
+            obj.save()
+            for chunk in self.iter_chunks(word_ids.iterator()):
+                self.link_words(obj, chunk)
+            obj.update_counters('word_count')
+        return obj
+
+    def read_cards(self):
+        """
+        Parse the whole file into self.cards, for diff of words and
+        for cards sent between processes, return None if file wasn't
+        recognized or has no cards
+        """
+        try:
+            self.cards = list(self.iter_cards() or []) or None
+        except (ParseError, csv.Error, UnicodeDecodeError):
+            self.cards = None
+        return self.cards
+
+    def get_extension(self):
+        return self.uploaded_file.name.split(".")[-1].lower()
 
     def get_handler(self):
-        extension = self.uploaded_file.name.split(".")[-1].lower()
+        extension = self.get_extension()
         if extension in self.allowed_extension:
             return getattr(self, extension, None)
         return None
 
+    def iter_cards(self):
+        """
+        Return generator of cards of uploaded file without
+        validating and saving them, used by import jobs
+        """
+        extension = self.get_extension()
+        if extension in self.allowed_extension:
+            return getattr(self, f'iter_{extension}')()
+        return None
+
+    def diff_words(self, obj):
+        """
+        Compare cards of file with words of dictionary by body:
+            - words with the same content are kept
+            - the rest of words and cards with the same body are
+            paired as updated words
+            - unpaired cards are new words, unpaired words are removed
+        Return lists of new cards, (word pk, card) of updated words
+        and pks of removed words
+        """
+        cards = defaultdict(list)
+        for card in dict.fromkeys(self.cards):
+            cards[card[0]].append(card)
+        words = defaultdict(list)
+        for pk, *card in obj.word.order_by('pk')\
+                .values_list('pk', 'body', 'translations', 'example'):
+            words[card[0]].append((pk, tuple(card)))
+
+        inserted, updated, removed = [], [], []
+        for body in cards.keys() | words.keys():
+            new_cards = cards.get(body, [])
+            old_words = []
+            for pk, card in words.get(body, []):
+                if card in new_cards:
+                    new_cards.remove(card)
+                else:
+                    old_words.append(pk)
+            updated.extend(zip(old_words, new_cards))
+            inserted.extend(new_cards[len(old_words):])
+            removed.extend(old_words[len(new_cards):])
+        return inserted, updated, removed
+
+    @staticmethod
+    def move_cards(cards, new_ids):
+        """
+        Move cards to new words by {old word id: new word id}, a card
+        is deleted instead if its lesson already has a card of the new
+        word, so (lesson, word) stays unique
+        """
+        taken = set(
+            cards
+            .filter(word_id__in=set(new_ids.values()))
+            .values_list('lesson_id', 'word_id')
+        )
+        duplicates = []
+        for pk, lesson_id, word_id in cards\
+                .filter(word_id__in=new_ids)\
+                .order_by('pk')\
+                .values_list('pk', 'lesson_id', 'word_id'):
+            key = (lesson_id, new_ids[word_id])
+            if key in taken:
+                duplicates.append(pk)
+            taken.add(key)
+        cards.filter(pk__in=duplicates).delete()
+        cards.filter(word_id__in=new_ids).update(
+            word_id=Case(*[
+                When(word_id=pk, then=Value(new_id))
+                for pk, new_id in new_ids.items()
+            ])
+        )
+
+    def replace_words(self, obj):
+        """
+        Update existing dictionary by new version of its file:
+            - only changed words are touched, see diff_words()
+            - words are shared by dictionaries, so updated word is
+            replaced by other word and cards of lessons are moved to
+            it keeping progress
+            - new words get cards in existing lessons, except lazy ones
+            - cards of removed words are deleted
+        Return numbers of inserted, updated and removed words
+        """
+        if self.cards is None:
+            self.read_cards()
+        inserted, updated, removed = self.diff_words(obj)
+        through = Dictionary.word.through
+        cards = Card.objects.filter(lesson__dictionary=obj)
+        # lazy lessons get cards of new words on the first answer
+        lesson_ids = list(
+            Lesson.objects
+            .filter(dictionary=obj, lazy=False)
+            .values_list('pk', flat=True)
+        )
+        with transaction.atomic():
+            for chunk in self.iter_chunks(
+                removed + [pk for pk, _ in updated]
+            ):
+                through.objects\
+                    .filter(dictionary=obj, word_id__in=chunk)\
+                    .delete()
+            for chunk in self.iter_chunks(removed):
+                cards.filter(word_id__in=chunk).delete()
+
+            for chunk in self.iter_chunks(updated):
+                new_ids = self.insert_words([card for _, card in chunk])
+                self.link_words(obj, new_ids)
+                self.move_cards(cards, {
+                    pk: new_id for (pk, _), new_id in zip(chunk, new_ids)
+                })
+
+            for chunk in self.iter_chunks(inserted):
+                new_ids = self.insert_words(chunk)
+                self.link_words(obj, new_ids)
+                # new version may have words the dictionary already has
+                Card.objects.bulk_create([
+                    Card(lesson_id=lesson_id, word_id=word_id)
+                    for lesson_id in lesson_ids
+                    for word_id in dict.fromkeys(new_ids)
+                ], ignore_conflicts=True)
+
+            obj.update_counters('word_count')
+            obj.file = self.uploaded_file
+            obj.file_hash = self.get_content_hash()
+            # counters are recounted above, don't overwrite them
+            obj.save(update_fields=['file', 'file_hash'])
+        return len(inserted), len(updated), len(removed)
+
     def clean_file(self):
         handler = self.get_handler()
         if handler:
-            if handler():
+            if self.find_duplicate() or handler():
                 return self.uploaded_file
         return None
 
     def parse_file(self, obj=None):
         handler = self.get_handler()
         if handler:
+            if obj and (self.duplicate or self.find_duplicate()):
+                return self.copy_dictionary(obj, self.duplicate)
+            if obj:
+                obj.file_hash = self.get_content_hash()
             return handler(obj)
         return None
+
+
+def parse_archive_member(name, content):
+    """
+    Parse file of archive in worker process of ArchiveManager,
+    DB is not touched here. Return title, cards and content hash
+    or None if file wasn't recognized
+    """
+    manager = DictionaryFileManager(ContentFile(content, name=name))
+    # cards are sent to the main process, so they are kept here
+    cards = manager.read_cards()
+    if not cards:
+        return None
+    return manager.title, cards, manager.get_content_hash()
+
+
+class ArchiveManager:
+    """
+    Class responsible to import zip archive of dictionaries:
+        - take files with allowed extensions from archive
+        - reject archive over limits of settings before unpacking,
+        so archive with huge compression ratio isn't read in memory
+        - parse them in process pool, as parsing is CPU-bound,
+        workers are started by forkserver, so they don't inherit
+        DB connection, open transaction and threads of web process
+        - save parsed dictionaries in batches by DictionaryFileManager
+        in one transaction
+    max_workers = None means number of CPUs
+    """
+    max_workers = None
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.skipped = []
+
+    def clean_archive(self):
+        """
+        Return archive if it has dictionaries, None otherwise,
+        ValidationError is raised if archive is over limits
+        """
+        if not zipfile.is_zipfile(self.archive):
+            return None
+        with zipfile.ZipFile(self.archive) as archive:
+            members = list(self.get_members(archive))
+        self.check_limits(members)
+        return self.archive if members else None
+
+    @staticmethod
+    def check_limits(members):
+        megabyte = 1024 * 1024
+        if len(members) > settings.ARCHIVE_MAX_MEMBERS:
+            raise ValidationError(
+                f'В архиве больше {settings.ARCHIVE_MAX_MEMBERS} словарей'
+            )
+        for info in members:
+            if info.file_size > settings.ARCHIVE_MEMBER_MAX_SIZE:
+                raise ValidationError(
+                    f'Файл {os.path.basename(info.filename)} больше '
+                    f'{settings.ARCHIVE_MEMBER_MAX_SIZE // megabyte} МБ'
+                )
+        if sum(info.file_size for info in members) > \
+                settings.ARCHIVE_MAX_TOTAL_SIZE:
+            raise ValidationError(
+                f'Распакованный архив больше '
+                f'{settings.ARCHIVE_MAX_TOTAL_SIZE // megabyte} МБ'
+            )
+
+    @staticmethod
+    def get_members(archive):
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            extension = name.split('.')[-1].lower()
+            if info.is_dir() or name.startswith('.') or \
+                    extension not in DictionaryFileManager.allowed_extension:
+                continue
+            yield info
+
+    def iter_members(self):
+        """
+        Read files of archive one by one, reading is bounded by the
+        limit, as sizes in headers of archive can be forged, such
+        files and damaged ones are skipped
+        """
+        limit = settings.ARCHIVE_MEMBER_MAX_SIZE
+        self.archive.seek(0)
+        with zipfile.ZipFile(self.archive) as archive:
+            for info in self.get_members(archive):
+                name = os.path.basename(info.filename)
+                try:
+                    with archive.open(info) as member:
+                        content = member.read(limit + 1)
+                except (zipfile.BadZipFile, EOFError):
+                    content = None
+                if content is None or len(content) > limit:
+                    self.skipped.append(name)
+                    continue
+                yield name, content
+
+    @staticmethod
+    def get_executor(max_workers):
+        """
+        Return process pool for parsing, import is run inside
+        transaction.atomic(), so workers aren't forked from current
+        process, forkserver starts them from a clean interpreter
+        where django is set up by initializer
+        """
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=get_context('forkserver'),
+            initializer=django.setup,
+        )
+
+    def iter_parsed(self):
+        """
+        Return (name, content, parsed) for files of archive, parsing
+        is done in parallel with a bounded number of files in memory
+        """
+        max_workers = self.max_workers or os.cpu_count()
+        with self.get_executor(max_workers) as executor:
+            window = max_workers * 2
+            members = self.iter_members()
+            while chunk := list(islice(members, window)):
+                names, contents = zip(*chunk)
+                yield from zip(
+                    names,
+                    contents,
+                    executor.map(parse_archive_member, names, contents),
+                )
+
+    def import_archive(self, author, note='', status='private'):
+        """
+        Create dictionaries from all recognized files of archive,
+        names of other files are kept in self.skipped
+        """
+        dictionaries = []
+        with transaction.atomic():
+            for name, content, parsed in self.iter_parsed():
+                if parsed is None:
+                    self.skipped.append(name)
+                    continue
+                manager = DictionaryFileManager(
+                    ContentFile(content, name=name)
+                )
+                manager.title, manager.cards, manager.content_hash = parsed
+                obj = Dictionary(
+                    author=author,
+                    note=note,
+                    status=status,
+                    file=manager.uploaded_file,
+                )
+                dictionaries.append(manager.parse_file(obj))
+        return dictionaries
@@ -0,0 +1,134 @@
+import csv
+import logging
+import time
+from _elementtree import ParseError
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from slugify import slugify
+
+from dictionary.helpers import DictionaryFileManager
+from dictionary.models import Dictionary, ImportJob
+
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_job():
+    """
+    Take the oldest queued job or running job abandoned by dead worker,
+    conditional update guarantees that parallel workers never take
+    the same job:
+        - running job is abandoned if its progress wasn't saved for
+        IMPORT_JOB_TIMEOUT seconds, saving of progress is heartbeat
+        - progress of taken job is reset, it's imported from the start
+    """
+    stale = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_TIMEOUT)
+    claimable = Q(status='queued') | Q(status='running', updated__lt=stale)
+    candidates = ImportJob.objects.filter(claimable)\
+        .values_list('pk', flat=True)[:10]
+    for job_pk in candidates:
+        claimed = ImportJob.objects\
+            .filter(claimable, pk=job_pk)\
+            .update(
+                status='running',
+                cards_parsed=0,
+                cards_inserted=0,
+                updated=timezone.now()
+            )
+        if claimed:
+            return ImportJob.objects.get(pk=job_pk)
+    return None
+
+
+def run_import_job(job):
+    """
+    Import file of the job:
+        - file imported before is replaced by stored one and
+        dictionary takes words of the first dictionary
+        - stream cards of file and insert words batch by batch,
+        progress is saved in job after each batch
+        - create dictionary and link all words to it in one
+        transaction, so dictionary appears only when it is complete
+        - in case of errors keep error in job, inserted words are left
+        to delete_orphan_words
+    """
+    manager = DictionaryFileManager(job.file)
+    manager.content_hash = job.file_hash
+    word_ids = []
+    try:
+        obj = Dictionary(
+            author_id=job.author_id,
+            note=job.note,
+            status=job.dictionary_status,
+            file=job.file.name,
+            file_hash=manager.get_content_hash(),
+        )
+        duplicate = manager.find_duplicate()
+        if duplicate:
+            job.file.delete(save=False)
+            job.file = duplicate.file.name
+            manager.copy_dictionary(obj, duplicate)
+            job.cards_parsed = job.cards_inserted = obj.word_count
+            job.dictionary = obj
+            job.status = 'done'
+            job.save()
+            return job
+
+        cards = manager.iter_cards()
+        for chunk in manager.iter_chunks(cards or []):
+            job.cards_parsed += len(chunk)
+            word_ids.extend(manager.insert_words(chunk))
+            job.cards_inserted = len(word_ids)
+            job.save(update_fields=[
+                'cards_parsed', 'cards_inserted', 'updated'
+            ])
+        if not word_ids:
+            raise ValueError('File has no cards')
+
+        # heartbeat isn't visible to other workers inside transaction,
+        # linking has the whole IMPORT_JOB_TIMEOUT from here
+        job.save(update_fields=['updated'])
+        with transaction.atomic():
+            obj.title = manager.title or 'Без имени'
+            obj.slug = slugify(obj.title)
+            obj.save()
+            for chunk in manager.iter_chunks(word_ids):
+                manager.link_words(obj, chunk)
+            obj.update_counters('word_count')
+            job.dictionary = obj
+            job.status = 'done'
+            job.save()
+
+    except Exception as error:
+        # UnicodeDecodeError of csv files is ValueError as well
+        if isinstance(error, (ParseError, csv.Error, ValueError)):
+            job.error = 'Загруженный файл не был распознан'
+        else:
+            logger.exception('Import job %s failed', job.pk)
+            job.error = 'Что-то пошло не так, повторите попытку'
+        # inserted words aren't deleted: canonical words can be already
+        # fetched by a parallel job which links them at its end,
+        # orphans are removed by delete_orphan_words when no job runs
+        job.status = 'failed'
+        job.save()
+    finally:
+        job.file.close()
+    return job
+
+
+def process_jobs(once=False, sleep=1):
+    """
+    Worker loop, with once=True stops when there is no queued jobs
+    """
+    while True:
+        job = claim_next_job()
+        if job:
+            run_import_job(job)
+        elif once:
+            return
+        else:
+            time.sleep(sleep)
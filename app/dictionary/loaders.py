@@ -0,0 +1,63 @@
+from django.core.exceptions import ValidationError
+
+from dictionary.models import Dictionary, Word
+from lesson.models import Card, Lesson
+
+
+class RequestLoader:
+    """
+    Identity map of objects loaded during one request, decorators
+    and views fetch objects through it, so each object is loaded at
+    most once per request:
+        - missing objects and invalid pks are cached as None
+        - related objects loaded by joins are added to the map too
+    """
+    querysets = {
+        Dictionary: Dictionary.objects.select_related('author'),
+        Lesson: Lesson.objects.select_related('dictionary__author'),
+        Card: Card.objects.select_related('word'),
+        Word: Word.objects.all(),
+    }
+
+    def __init__(self):
+        self.objects = {}
+
+    def get(self, model, pk):
+        try:
+            pk = model._meta.pk.to_python(pk)
+        except ValidationError:
+            return None
+        key = (model, pk)
+        if key not in self.objects:
+            self.objects[key] = self.querysets[model].filter(pk=pk).first()
+        return self.objects[key]
+
+    def add(self, obj):
+        return self.objects.setdefault((type(obj), obj.pk), obj)
+
+    def dictionary(self, pk):
+        return self.get(Dictionary, pk)
+
+    def lesson(self, pk):
+        lesson = self.get(Lesson, pk)
+        if lesson is not None:
+            lesson.dictionary = self.add(lesson.dictionary)
+        return lesson
+
+    def word(self, pk):
+        return self.get(Word, pk)
+
+    def card(self, pk):
+        card = self.get(Card, pk)
+        if card is not None:
+            card.lesson = self.lesson(card.lesson_id)
+        return card
+
+
+def get_loader(request):
+    """
+    Return loader of request, it's created on the first call
+    """
+    if not hasattr(request, 'loader'):
+        request.loader = RequestLoader()
+    return request.loader
@@ -0,0 +1,192 @@
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from dictionary.helpers import DictionaryFileManager
+from dictionary.models import Dictionary
+
+
+HEADER = (
+    '<?xml version="1.0" encoding="utf-16"?>\r\n'
+    '<dictionary xmlns="" formatVersion="3" title="{title}" '
+    'sourceLanguageId="1033" destinationLanguageId="1049" '
+    'nextWordId="{next_id}">\r\n'
+    '\t<statistics defectiveMeaningsQuantity="0" '
+    'suspendedMeaningsQuantity="0" readyMeaningsQuantity="0" '
+    'activeMeaningsQuantity="{size}" repeatedMeaningsQuantity="0" '
+    'learnedMeaningsQuantity="0"/>\r\n\t'
+)
+CARD = (
+    '<card><word wordId="{pk}">word {pk}</word><meanings>'
+    '<meaning transcription="w{pk}"><statistics status="3" answered="1"/>'
+    '<translations><word>слово {pk}</word></translations>'
+    '<examples><example>word {pk} — слово {pk}</example></examples>'
+    '</meaning></meanings></card>'
+)
+FOOTER = '\r\n</dictionary>\r\n'
+
+
+def write_lt_dictionary(path, size):
+    """
+    Write synthetic UTF-16 dictionary in the format of LT exports
+    with given number of cards
+    """
+    with open(path, 'w', encoding='utf-16', newline='') as file:
+        file.write(HEADER.format(
+            title=f'Benchmark {size}', next_id=size + 1, size=size
+        ))
+        for pk in range(1, size + 1):
+            file.write(CARD.format(pk=pk))
+        file.write(FOOTER)
+
+
+def clean_file(path, user, size):
+    with open(path, 'rb') as file:
+        DictionaryFileManager(file).clean_file()
+
+
+def parse_file(path, user, size):
+    with open(path, 'rb') as file:
+        dictionary = DictionaryFileManager(file).parse_file(
+            Dictionary(
+                author=user, file=File(file, os.path.basename(path))
+            )
+        )
+    if dictionary is None or dictionary.word_count != size:
+        raise CommandError(f'Parsing of {path} failed')
+
+
+def upload_file(path, user, size):
+    client = Client()
+    client.force_login(user)
+    with open(path, 'rb') as file:
+        res = client.post(
+            reverse('dictionary:upload_file'),
+            {
+                'author': user.pk,
+                'note': 'benchmark',
+                'status': 'private',
+                'file': file
+            }
+        )
+    # failed upload redirects too, back to the upload page
+    dictionary = Dictionary.objects.filter(author=user).first()
+    if res.status_code != 302 \
+            or res.url != reverse('dictionary:my_dictionaries') \
+            or dictionary is None or dictionary.word_count != size:
+        raise CommandError(f'Upload of {path} failed')
+
+
+STAGES = {
+    'clean': clean_file,
+    'parse': parse_file,
+    'upload': upload_file,
+}
+
+
+class QueryCounter:
+    """
+    Count queries without keeping their SQL, captured SQL of bulk
+    inserts would take more memory than the measured stage
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure_stage(stage, path, size, media_root):
+    """
+    Run stage in a fresh process and return wall time, number of
+    queries, peak RSS and its growth (KB), all changes in DB
+    are rolled back
+    """
+    setup_test_environment()
+    with override_settings(MEDIA_ROOT=media_root), transaction.atomic():
+        user = get_user_model().objects.create_user(
+            username='benchmark_import'
+        )
+        queries = QueryCounter()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            STAGES[stage](path, user, size)
+            wall_time = time.perf_counter() - start
+        rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        transaction.set_rollback(True)
+    return wall_time, queries.count, rss_peak, rss_peak - rss_before
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic LT dictionaries and report wall time, '
+        'number of queries and peak RSS of validating and saving '
+        'them by DictionaryFileManager and AddDictionaryView'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[1000, 10000, 100000],
+            help='Number of cards in generated dictionaries',
+        )
+        parser.add_argument(
+            '--stages',
+            nargs='+',
+            choices=list(STAGES),
+            default=list(STAGES),
+            help='clean - validation, parse - saving by the manager, '
+                 'upload - POST to AddDictionaryView',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"stage":>8} {"cards":>10} {"time, s":>10} {"queries":>8} '
+            f'{"peak RSS, KB":>14} {"RSS growth, KB":>16}'
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in options['sizes']:
+                path = os.path.join(tmp_dir, f'dictionary_{size}.xml')
+                write_lt_dictionary(path, size)
+                for stage in options['stages']:
+                    self.stdout.write(
+                        f'{stage:>8} {size:>10} ' + self.format_result(
+                            *self.run_stage(stage, path, size, tmp_dir)
+                        )
+                    )
+
+    @staticmethod
+    def run_stage(stage, path, size, media_root):
+        # every stage is run in a new process, otherwise peak RSS of
+        # the previous run hides the next one, forked process must
+        # open its own connection to DB
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context('fork'),
+        ) as executor:
+            return executor.submit(
+                measure_stage, stage, path, size, media_root
+            ).result()
+
+    @staticmethod
+    def format_result(wall_time, queries, rss_peak, rss_growth):
+        return (
+            f'{wall_time:>10.3f} {queries:>8} '
+            f'{rss_peak:>14} {rss_growth:>16}'
+        )
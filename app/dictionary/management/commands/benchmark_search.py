@@ -0,0 +1,155 @@
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from dictionary.models import Dictionary, Word
+from dictionary.search import SearchResults
+
+
+def distinct_search(query, user):
+    """
+    Search as it was made by dictionary_search before two-phase
+    search: dictionaries joined to all their words with DISTINCT
+    """
+    return Dictionary.detail_objects.filter(
+        Q(author=user.id) | (Q(status='public'))).\
+        filter(
+        Q(
+            title__icontains=query
+        ) | (Q(
+            word__body__icontains=query
+        )) | (Q(
+            word__translations__icontains=query
+        ))
+    ).distinct()
+
+
+def two_phase_search(query, user):
+    return SearchResults(query, user)
+
+
+SEARCHES = {
+    'distinct': distinct_search,
+    'two-phase': two_phase_search,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill DB with synthetic dictionaries and compare wall time and '
+        'number of queries of the first page of search results by the '
+        'DISTINCT join and by two-phase search, all data is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--words',
+            type=int,
+            default=1000000,
+            help='Number of generated words',
+        )
+        parser.add_argument(
+            '--dictionaries',
+            type=int,
+            default=1000,
+            help='Number of dictionaries words are split into',
+        )
+        parser.add_argument(
+            '--queries',
+            nargs='+',
+            default=['lemma4242', 'слово4242', 'missing'],
+            help='Search queries, words are "lemmaN" with "словоN" '
+                 'translations, N is number of word modulo 10000',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Number of runs of each query, the best is reported',
+        )
+
+    # search cache is replaced by dummy one, so every run measures
+    # the search and cache of the app on the host isn't touched
+    @override_settings(CACHES={
+        **settings.CACHES,
+        'search': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    })
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username='benchmark_search'
+            )
+            self.fill(user, options['words'], options['dictionaries'])
+            self.stdout.write(
+                f'{"search":>10} {"query":>12} {"found":>8} '
+                f'{"time, s":>10} {"queries":>8}'
+            )
+            for query in options['queries']:
+                for name, search in SEARCHES.items():
+                    found, wall_time, queries = min(
+                        (
+                            self.measure(search, query, user)
+                            for _ in range(options['repeat'])
+                        ),
+                        key=lambda result: result[1]
+                    )
+                    self.stdout.write(
+                        f'{name:>10} {query:>12} {found:>8} '
+                        f'{wall_time:>10.3f} {queries:>8}'
+                    )
+            transaction.set_rollback(True)
+
+    def fill(self, user, words, dictionaries):
+        """
+        Insert words split into dictionaries in batches
+        """
+        batch_size = 10000
+        dictionary_ids = [
+            dictionary.pk for dictionary in Dictionary.objects.bulk_create(
+                Dictionary(
+                    title=f'Benchmark {i}',
+                    slug=f'benchmark-{i}',
+                    status='public',
+                    author=user
+                ) for i in range(dictionaries)
+            )
+        ]
+        through = Dictionary.word.through
+        # words of the same lemma are spread over dictionaries
+        rng = random.Random(0)
+        for start in range(0, words, batch_size):
+            batch = Word.objects.bulk_create(
+                Word(
+                    body=f'lemma{i % 10000} {i}',
+                    translations=f'слово{i % 10000}',
+                    example=f'lemma{i % 10000} — слово{i % 10000}',
+                ) for i in range(start, min(start + batch_size, words))
+            )
+            through.objects.bulk_create(
+                through(
+                    dictionary_id=rng.choice(dictionary_ids),
+                    word_id=word.pk
+                ) for word in batch
+            )
+
+    @staticmethod
+    def measure(search, query, user):
+        """
+        Return number of found dictionaries, wall time and number of
+        queries of counting results and fetching the first page
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            results = search(query, user)
+            found = results.count()
+            list(results[:settings.DICTIONARY_PAGE_SIZE])
+            wall_time = time.perf_counter() - start
+        return found, wall_time, len(queries)
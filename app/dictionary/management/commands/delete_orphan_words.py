@@ -0,0 +1,53 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from dictionary.models import ImportJob, Word
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete words not linked to any dictionary and without cards, '
+        'e.g. left by failed import jobs. Running import job may have '
+        'fetched any old orphan to link it at its end, so nothing is '
+        'deleted while jobs are running'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=float,
+            default=24,
+            help='Keep orphan words created less than this hours ago',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of words deleted by one query',
+        )
+
+    def handle(self, *args, **options):
+        orphans = Word.objects.filter(
+            dictionary__isnull=True,
+            word__isnull=True,
+            created__lt=timezone.now() - timedelta(hours=options['hours']),
+        )
+        pks = orphans.values_list('pk', flat=True).iterator()
+        deleted = 0
+        while chunk := list(islice(pks, options['batch_size'])):
+            with transaction.atomic():
+                # checked for every batch, job can start meanwhile
+                if ImportJob.objects.filter(status='running').exists():
+                    self.stdout.write(
+                        'Stopped, import jobs are running'
+                    )
+                    break
+                # word could be linked since it was selected
+                deleted += orphans.filter(pk__in=chunk).delete()[1].get(
+                    'dictionary.Word', 0
+                )
+        self.stdout.write(f'Deleted {deleted} orphan words')
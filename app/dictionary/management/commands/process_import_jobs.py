@@ -0,0 +1,47 @@
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from dictionary.jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Import dictionaries queued by background uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes importing jobs in parallel',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Stop when there are no queued jobs left',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1,
+            help='Seconds to wait before checking the queue again',
+        )
+
+    def handle(self, *args, **options):
+        once, sleep = options['once'], options['sleep']
+        if options['workers'] <= 1:
+            process_jobs(once=once, sleep=sleep)
+            return
+
+        # forked workers must open their own DB connections
+        connections.close_all()
+        context = get_context('fork')
+        workers = [
+            context.Process(target=process_jobs, args=(once, sleep))
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,39 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from dictionary.models import Dictionary
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount persisted word_count and student_count of dictionaries, '
+        'e.g. after users were deleted or words were linked by hand, '
+        'and optionally rebuild previews of words'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of dictionaries updated by one query',
+        )
+        parser.add_argument(
+            '--previews',
+            action='store_true',
+            help='Rebuild previews of words, one query per dictionary',
+        )
+
+    def handle(self, *args, **options):
+        pks = Dictionary.objects.values_list('pk', flat=True).iterator()
+        updated = 0
+        while chunk := list(islice(pks, options['batch_size'])):
+            updated += Dictionary.objects\
+                .filter(pk__in=chunk)\
+                .update(**Dictionary.counters())
+        self.stdout.write(f'Counters of {updated} dictionaries recounted')
+        if options['previews']:
+            for dictionary in Dictionary.objects.only('pk').iterator():
+                dictionary.update_preview()
+            self.stdout.write('Previews rebuilt')
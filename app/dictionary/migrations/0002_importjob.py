@@ -0,0 +1,38 @@
+# Generated by Django 4.0 on 2026-10-18 06:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dictionary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='file/%Y/%m/%d/')),
+                ('note', models.CharField(blank=True, max_length=500)),
+                ('dictionary_status', models.CharField(choices=[('private', 'Private'), ('public', 'Public')], default='private', max_length=10)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('cards_parsed', models.PositiveIntegerField(default=0)),
+                ('cards_inserted', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=500)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+                ('dictionary', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='dictionary.dictionary')),
+            ],
+            options={
+                'verbose_name': 'Импорт словаря',
+                'verbose_name_plural': 'Импорт словарей',
+                'ordering': ('created',),
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0002_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dictionary',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='file_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
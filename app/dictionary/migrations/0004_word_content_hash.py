@@ -0,0 +1,51 @@
+# Generated by Django 4.0 on 2026-10-18 06:33
+
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def make_content_hash(body, translations, example):
+    content = '\x1f'.join((body, translations, example))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def set_content_hash(apps, schema_editor):
+    """
+    The first of words with the same content becomes canonical,
+    the rest stay private copies without hash
+    """
+    Word = apps.get_model('dictionary', 'Word')
+    groups = Word.objects\
+        .values('body', 'translations', 'example')\
+        .annotate(first_pk=Min('pk'))\
+        .order_by()
+    batch = []
+    for group in groups.iterator():
+        batch.append(Word(
+            pk=group['first_pk'],
+            content_hash=make_content_hash(
+                group['body'], group['translations'], group['example']
+            )
+        ))
+        if len(batch) == 1000:
+            Word.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    Word.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0003_file_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(set_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0 on 2026-10-18 06:41
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_related(through, field):
+    rows = through.objects\
+        .filter(dictionary=OuterRef('pk'))\
+        .values('dictionary')\
+        .annotate(total=Count(field))\
+        .values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def set_counters(apps, schema_editor):
+    Dictionary = apps.get_model('dictionary', 'Dictionary')
+    Dictionary.objects.update(
+        word_count=count_related(Dictionary.word.through, 'word'),
+        student_count=count_related(Dictionary.student.through, 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0004_word_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dictionary',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dictionary',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(set_counters, migrations.RunPython.noop),
+    ]
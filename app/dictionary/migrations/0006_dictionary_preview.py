@@ -0,0 +1,30 @@
+# Generated by Django 4.0 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+def set_preview(apps, schema_editor):
+    Dictionary = apps.get_model('dictionary', 'Dictionary')
+    for dictionary in Dictionary.objects.iterator():
+        dictionary.preview = list(
+            dictionary.word
+            .order_by('body')
+            .values_list('body', 'translations')[:30]
+        )
+        dictionary.save(update_fields=['preview'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0005_dictionary_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dictionary',
+            name='preview',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(set_preview, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0 on 2026-10-18 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0006_dictionary_preview'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dictionary',
+            index=models.Index(fields=['title', 'id'], name='dictionary__title_ba8234_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+from django.db import migrations
+
+
+# statements are copied here, so the migration doesn't depend on code
+# of dictionary.search, which can change later
+
+POSTGRESQL_INDEX = [
+    """
+    ALTER TABLE dictionary_word
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple',
+        body || ' ' || translations || ' ' || example
+    )) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS dictionary_word_search_vector
+    ON dictionary_word USING GIN (search_vector)
+    """,
+    """
+    ALTER TABLE dictionary_dictionary
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', title)) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS dictionary_dictionary_search_vector
+    ON dictionary_dictionary USING GIN (search_vector)
+    """,
+]
+
+POSTGRESQL_DROP_INDEX = [
+    'ALTER TABLE dictionary_word DROP COLUMN IF EXISTS search_vector',
+    'ALTER TABLE dictionary_dictionary '
+    'DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def fts5_table(table, columns):
+    fts = f'{table}_fts'
+    values = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {values}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    insert = f'INSERT INTO {fts}(rowid, {values}) VALUES (new.id, {new});'
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5({values}, content='{table}', content_rowid='id')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+        BEGIN {insert} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+        BEGIN {delete} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table}
+        BEGIN {delete} {insert} END
+        """,
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+SQLITE_INDEX = [
+    *fts5_table('dictionary_word', ('body', 'translations', 'example')),
+    *fts5_table('dictionary_dictionary', ('title',)),
+]
+
+SQLITE_DROP_INDEX = [
+    'DROP TABLE IF EXISTS dictionary_word_fts',
+    'DROP TABLE IF EXISTS dictionary_dictionary_fts',
+]
+
+
+def execute(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0007_dictionary_title_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            execute({
+                'postgresql': POSTGRESQL_INDEX,
+                'sqlite': SQLITE_INDEX,
+            }),
+            execute({
+                'postgresql': POSTGRESQL_DROP_INDEX,
+                'sqlite': SQLITE_DROP_INDEX,
+            }),
+        ),
+    ]
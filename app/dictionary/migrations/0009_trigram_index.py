@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# statements are copied here, so the migration doesn't depend on code
+# of dictionary.search, which can change later
+
+POSTGRESQL_TRIGRAM_INDEX = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE INDEX IF NOT EXISTS dictionary_word_body_trgm
+    ON dictionary_word USING GIN (body gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS dictionary_word_translations_trgm
+    ON dictionary_word USING GIN (translations gin_trgm_ops)
+    """,
+]
+
+POSTGRESQL_DROP_TRIGRAM_INDEX = [
+    'DROP INDEX IF EXISTS dictionary_word_body_trgm',
+    'DROP INDEX IF EXISTS dictionary_word_translations_trgm',
+]
+
+
+def execute(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            execute(POSTGRESQL_TRIGRAM_INDEX),
+            execute(POSTGRESQL_DROP_TRIGRAM_INDEX),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.0 on 2026-10-18 07:45
+
+import random
+from itertools import islice
+
+from django.db import migrations, models
+import django.db.models.deletion
+import dictionary.models
+
+
+def set_random_keys(apps, schema_editor):
+    """
+    Default is evaluated once for existing rows by AddField, keys are
+    generated in Python in batches: RANDOM() of SQLite isn't in [0, 1)
+    """
+    DictionaryWord = apps.get_model('dictionary', 'DictionaryWord')
+    pks = DictionaryWord.objects.order_by('pk').values_list('pk', flat=True)
+    pks = pks.iterator()
+    while chunk := list(islice(pks, 1000)):
+        DictionaryWord.objects.bulk_update(
+            [DictionaryWord(pk=pk, random_key=random.random()) for pk in chunk],
+            ['random_key']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0009_trigram_index'),
+    ]
+
+    operations = [
+        # auto-created m2m table becomes table of DictionaryWord,
+        # columns and constraints are the same, so only state changes
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='DictionaryWord',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('dictionary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dictionary.dictionary')),
+                        ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dictionary.word')),
+                    ],
+                    options={
+                        'db_table': 'dictionary_dictionary_word',
+                        'unique_together': {('dictionary', 'word')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='dictionary',
+                    name='word',
+                    field=models.ManyToManyField(through='dictionary.DictionaryWord', to='dictionary.Word'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dictionaryword',
+            name='random_key',
+            field=models.FloatField(default=dictionary.models.random_key, editable=False),
+        ),
+        migrations.RunPython(set_random_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dictionaryword',
+            index=models.Index(fields=['dictionary', 'random_key'], name='dictionary__diction_0e0ac3_idx'),
+        ),
+    ]
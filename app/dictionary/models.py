@@ -1,16 +1,36 @@
+import hashlib
+import random
+
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 
 
+def count_related(through, field):
+    """
+    Subquery counting rows of m2m table for dictionary of outer query,
+    used to recount persisted counters of dictionaries
+    """
+    rows = through.objects\
+        .filter(dictionary=OuterRef('pk'))\
+        .values('dictionary')\
+        .annotate(total=Count(field))\
+        .values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def random_key():
+    return random.random()
+
+
 class DetailManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset()\
             .select_related('author')\
-            .prefetch_related('student')\
-            .prefetch_related('word')
+            .prefetch_related('student')
 
     def get_available(self, user):
         """
@@ -47,20 +67,32 @@ class Dictionary(models.Model):
         choices=STATUS_CHOICES,
         default='private'
     )
-    word = models.ManyToManyField('Word')
+    word = models.ManyToManyField('Word', through='DictionaryWord')
     note = models.CharField(max_length=500)
     file = models.FileField(upload_to='file/%Y/%m/%d/')
+    # sha256 of file, to reuse file and words of the same uploads
+    file_hash = models.CharField(max_length=64, blank=True, db_index=True)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name='creator_of_dictionary'
     )
+    # persisted sizes of dictionary for listings, see update_counters()
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    # [body, translations] of the first words for listings,
+    # so they don't load all words of dictionary, see update_preview()
+    preview = models.JSONField(default=list, editable=False)
+
+    preview_size = 30
 
     objects = models.Manager()
     detail_objects = DetailManager()
 
     class Meta:
         ordering = ('title',)
+        # keyset pagination of lists, see CursorPaginationMixin
+        indexes = [models.Index(fields=('title', 'id'))]
         verbose_name = 'Словарь'
         verbose_name_plural = 'Словари'
 
@@ -73,6 +105,37 @@ class Dictionary(models.Model):
             kwargs={'pk': self.pk}
         )
 
+    @classmethod
+    def counters(cls, *fields):
+        """
+        Return expressions recounting given counters (all by default)
+        to be used in update() of dictionaries
+        """
+        counters = {
+            'word_count': count_related(cls.word.through, 'word'),
+            'student_count': count_related(cls.student.through, 'user'),
+        }
+        return {name: counters[name] for name in fields or counters}
+
+    def update_counters(self, *fields):
+        """
+        Recount counters of dictionary by one UPDATE, called after
+        words or students are linked or unlinked in bulk,
+        preview is rebuilt together with number of words
+        """
+        counters = self.counters(*fields)
+        Dictionary.objects.filter(pk=self.pk).update(**counters)
+        self.refresh_from_db(fields=list(counters))
+        if 'word_count' in counters:
+            self.update_preview()
+
+    def update_preview(self):
+        self.preview = list(
+            self.word.values_list('body', 'translations')
+            [:self.preview_size]
+        )
+        Dictionary.objects.filter(pk=self.pk).update(preview=self.preview)
+
 
 class Word(models.Model):
     body = models.CharField(max_length=250)
@@ -80,6 +143,15 @@ class Word(models.Model):
     translations = models.CharField(max_length=250)
     example = models.CharField(max_length=250)
     created = models.DateTimeField(auto_now_add=True)
+    # canonical words imported from files are stored once,
+    # words without hash are private copies
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('body',)
@@ -89,3 +161,80 @@ class Word(models.Model):
 
     def __str__(self):
         return self.body
+
+    @staticmethod
+    def make_content_hash(body, translations, example):
+        content = '\x1f'.join((body, translations, example))
+        return hashlib.sha256(content.encode()).hexdigest()
+
+
+class DictionaryWord(models.Model):
+    """
+    Link of word to dictionary, canonical words are shared by
+    dictionaries, so their ids are sparse in dictionary and random
+    untouched word of lazy lesson is sought by random_key instead,
+    see Lesson.seek_untouched_card()
+    """
+    dictionary = models.ForeignKey(Dictionary, on_delete=models.CASCADE)
+    word = models.ForeignKey(Word, on_delete=models.CASCADE)
+    random_key = models.FloatField(default=random_key, editable=False)
+
+    class Meta:
+        # table of former auto-created m2m table is kept
+        db_table = 'dictionary_dictionary_word'
+        unique_together = (('dictionary', 'word'),)
+        indexes = [models.Index(fields=('dictionary', 'random_key'))]
+
+    def __str__(self):
+        return f'{self.dictionary_id}: {self.word_id}'
+
+
+class ImportJob(models.Model):
+    """
+    Uploaded file waiting to be imported in background by
+    process_import_jobs command, keeps progress of import
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='import_jobs'
+    )
+    file = models.FileField(upload_to='file/%Y/%m/%d/')
+    file_hash = models.CharField(max_length=64, blank=True)
+    note = models.CharField(max_length=500, blank=True)
+    dictionary_status = models.CharField(
+        max_length=10,
+        choices=Dictionary.STATUS_CHOICES,
+        default='private'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='queued',
+        db_index=True
+    )
+    cards_parsed = models.PositiveIntegerField(default=0)
+    cards_inserted = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=500, blank=True)
+    dictionary = models.ForeignKey(
+        Dictionary,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Импорт словаря'
+        verbose_name_plural = 'Импорт словарей'
+
+    def __str__(self):
+        return self.file.name
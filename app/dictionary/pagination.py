@@ -0,0 +1,110 @@
+import base64
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+
+
+def encode_cursor(values):
+    data = json.dumps(values, ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise Http404('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise Http404('Invalid cursor')
+    return values
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for list views instead of Paginator:
+        - objects are ordered by cursor_fields, the last of them must
+        be unique
+        - next page starts after values of the last shown object,
+        passed in opaque cursor, so deep pages cost the same as the
+        first one and objects are never counted
+        - one extra object is fetched to know if there is next page
+    """
+    cursor_fields = ('title', 'pk')
+    cursor_kwarg = 'cursor'
+    page_size = None
+
+    def get_page_size(self):
+        return self.page_size or settings.DICTIONARY_PAGE_SIZE
+
+    def paginate_by_cursor(self, queryset):
+        """
+        Return objects of page and cursor of the next page or None
+        """
+        fields = self.cursor_fields
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if cursor:
+            values = decode_cursor(cursor, len(fields))
+            # (a, b) > (x, y) is a > x or a = x and b > y
+            after = Q()
+            for i, field in enumerate(fields):
+                after |= Q(
+                    **dict(zip(fields[:i], values[:i])),
+                    **{f'{field}__gt': values[i]}
+                )
+            queryset = queryset.filter(after)
+        page_size = self.get_page_size()
+        objects = list(queryset.order_by(*fields)[:page_size + 1])
+        if len(objects) <= page_size:
+            return objects, None
+        last = objects[page_size - 1]
+        return objects[:page_size], encode_cursor([
+            getattr(last, field) for field in fields
+        ])
+
+    def get_context_data(self, **kwargs):
+        objects, next_cursor = self.paginate_by_cursor(self.object_list)
+        kwargs['object_list'] = objects
+        kwargs['next_cursor'] = next_cursor
+        kwargs['next_page_url'] = next_cursor and '?' + urlencode({
+            self.cursor_kwarg: next_cursor
+        })
+        return super().get_context_data(**kwargs)
+
+
+class FragmentResponseMixin:
+    """
+    Requests of infinite scroll (XMLHttpRequest) get only items of
+    the page instead of the whole page with base.html:
+        - items are rendered by item_template_name wrapped by
+        fragment_template_name, which keeps the next page link
+        for Waypoint.Infinite
+        - url of the next page is passed in X-Next-Page header too
+    """
+    fragment_template_name = 'dictionary/list_fragment.html'
+    item_template_name = None
+
+    def is_fragment_request(self):
+        return self.request.headers.get(
+            'x-requested-with'
+        ) == 'XMLHttpRequest'
+
+    def get_template_names(self):
+        if self.is_fragment_request():
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        kwargs['item_template_name'] = self.item_template_name
+        return super().get_context_data(**kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # the same url returns page or fragment
+        patch_vary_headers(response, ['X-Requested-With'])
+        if self.is_fragment_request() and context.get('next_page_url'):
+            response['X-Next-Page'] = context['next_page_url']
+        return response
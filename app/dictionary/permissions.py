@@ -0,0 +1,35 @@
+from dictionary.models import Dictionary
+
+
+def is_author(user, dictionary):
+    """
+    Check if user is author of dictionary, dictionary is loaded
+    object or None if it doesn't exist
+    """
+    if dictionary is None or not user.is_authenticated:
+        return False
+    return dictionary.author_id == user.pk
+
+
+def is_student(user, dictionary_pk):
+    """
+    Check if user added dictionary to his dictionaries, EXISTS over
+    index of the through table instead of loading all students
+    """
+    if not user.is_authenticated:
+        return False
+    return Dictionary.student.through.objects\
+        .filter(dictionary=dictionary_pk, user=user.pk)\
+        .exists()
+
+
+def can_learn(user, dictionary):
+    """
+    Check if user is author of dictionary or dictionary is public
+    and user is its student, at most one query is made
+    """
+    if is_author(user, dictionary):
+        return True
+    if dictionary is None or dictionary.status != 'public':
+        return False
+    return is_student(user, dictionary.pk)
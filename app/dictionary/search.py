@@ -0,0 +1,495 @@
+import hashlib
+import re
+from collections import defaultdict
+from itertools import chain
+
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count, Exists, Max, OuterRef, Q
+
+from dictionary.models import Dictionary, Word
+
+
+# Postgres keeps generated tsvector columns of words and titles with
+# GIN indexes, 'simple' configuration is used since dictionaries mix
+# english and russian words
+POSTGRESQL_INDEX = [
+    """
+    ALTER TABLE dictionary_word
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple',
+        body || ' ' || translations || ' ' || example
+    )) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS dictionary_word_search_vector
+    ON dictionary_word USING GIN (search_vector)
+    """,
+    """
+    ALTER TABLE dictionary_dictionary
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', title)) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS dictionary_dictionary_search_vector
+    ON dictionary_dictionary USING GIN (search_vector)
+    """,
+]
+
+
+def fts5_table(table, columns):
+    """
+    SQLite FTS5 table over columns of table, kept by triggers
+    """
+    fts = f'{table}_fts'
+    values = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {values}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    insert = f'INSERT INTO {fts}(rowid, {values}) VALUES (new.id, {new});'
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5({values}, content='{table}', content_rowid='id')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+        BEGIN {insert} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+        BEGIN {delete} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table}
+        BEGIN {delete} {insert} END
+        """,
+    ]
+
+
+SQLITE_INDEX = [
+    *fts5_table('dictionary_word', ('body', 'translations', 'example')),
+    *fts5_table('dictionary_dictionary', ('title',)),
+]
+
+
+def create_search_index(schema_editor):
+    """
+    Create full-text index for database of schema_editor, statements
+    are idempotent, so it's called after every migrate as well:
+    SQLite drops triggers when tables are remade by migrations,
+    migration 0008_search_index creates index in the first place
+    """
+    statements = {
+        'postgresql': POSTGRESQL_INDEX,
+        'sqlite': SQLITE_INDEX,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+# searches of the first phase return (id, rank) of matched words
+# and titles, the best first
+POSTGRESQL_WORDS = """
+    SELECT w.id, ts_rank(w.search_vector, q.query) AS rank
+    FROM dictionary_word w
+    CROSS JOIN (SELECT to_tsquery('simple', %s) AS query) q
+    WHERE w.search_vector @@ q.query
+    ORDER BY rank DESC, w.id
+    LIMIT %s
+"""
+
+POSTGRESQL_TITLES = """
+    SELECT d.id, ts_rank(d.search_vector, q.query) AS rank
+    FROM dictionary_dictionary d
+    CROSS JOIN (SELECT to_tsquery('simple', %s) AS query) q
+    WHERE d.search_vector @@ q.query
+    ORDER BY rank DESC, d.id
+    LIMIT %s
+"""
+
+SQLITE_WORDS = """
+    SELECT rowid, -rank FROM dictionary_word_fts
+    WHERE dictionary_word_fts MATCH %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+SQLITE_TITLES = """
+    SELECT rowid, -rank FROM dictionary_dictionary_fts
+    WHERE dictionary_dictionary_fts MATCH %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+VISIBLE = "(d.status = 'public' OR d.author_id = %s)"
+
+
+def fts5_query(query):
+    """
+    Words of query as FTS5 prefix phrases, so partial words match
+    like they did with icontains and any punctuation of user input
+    is not taken as FTS5 syntax
+    """
+    return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', query))
+
+
+def tsquery(query):
+    """
+    Words of query as tsquery of prefixes joined by AND, only word
+    characters are taken, so user input can't break tsquery syntax
+    """
+    return ' & '.join(f'{token}:*' for token in re.findall(r'\w+', query))
+
+
+def available_for(user, prefix=''):
+    """
+    Return Q of dictionaries visible in search for user: public ones
+    and own ones, prefix is path to dictionary from filtered model
+    """
+    return Q(**{f'{prefix}status': 'public'}) | Q(
+        **{f'{prefix}author': user.id}
+    )
+
+
+def get_cache_version(cache):
+    return cache.get_or_set('search:version', 1, timeout=None)
+
+
+def invalidate_search_cache():
+    """
+    Make all cached results outdated, called when dictionaries
+    visible in search are changed
+    """
+    cache = caches['search']
+    try:
+        cache.incr('search:version')
+    except ValueError:
+        cache.set('search:version', 1, timeout=None)
+
+
+def cached_search(kind, query, user, search):
+    """
+    Return result of search from cache, keys contain kind of search,
+    normalized query, visibility scope of user (anonymous users see
+    only public dictionaries, users see their own ones as well) and
+    version of cache changed by invalidate_search_cache()
+    """
+    cache = caches['search']
+    normalized = ' '.join(query.lower().split())
+    scope = f'user:{user.id}' if user.id else 'public'
+    key = ':'.join((
+        'search',
+        str(get_cache_version(cache)),
+        kind,
+        scope,
+        hashlib.sha256(normalized.encode()).hexdigest(),
+    ))
+    result = cache.get(key)
+    if result is None:
+        result = search()
+        cache.set(key, result)
+    return result
+
+
+class SearchResults:
+    """
+    Ranked results of search of dictionaries available for user
+    by titles and by words, made in two phases instead of joining
+    dictionaries to all their words with DISTINCT:
+        - the first phase finds at most word_limit best words and
+        titles by the full-text index of database (icontains for
+        databases without it)
+        - the second phase selects available dictionaries by EXISTS
+        on m2m table of matched words
+        - dictionary is ranked by its best word, title matches weigh
+        twice as much, matched words are kept as highlights
+        - count() and slicing are supported, so results are paginated
+        by Paginator
+    """
+    word_limit = 1000
+    highlights_size = 5
+
+    def __init__(self, query, user):
+        self.query = query
+        self.user = user
+        self.user_id = user.id
+        self.vendor = connection.vendor
+        self._ranked = None
+
+    def has_terms(self):
+        return re.search(r'\w', self.query) is not None
+
+    def run_search(self, sql, query):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [query, self.word_limit])
+            return dict(cursor.fetchall())
+
+    def match_words(self):
+        """
+        Return {word pk: rank} of the best matched words
+        """
+        if self.vendor == 'postgresql':
+            return self.run_search(POSTGRESQL_WORDS, tsquery(self.query))
+        if self.vendor == 'sqlite':
+            return self.run_search(SQLITE_WORDS, fts5_query(self.query))
+        pks = Word.objects.filter(
+            Q(body__icontains=self.query) | (Q(
+                translations__icontains=self.query
+            ))
+        ).order_by().values_list('pk', flat=True)[:self.word_limit]
+        return dict.fromkeys(pks, 1)
+
+    def match_titles(self):
+        """
+        Return {dictionary pk: rank} of the best matched titles
+        """
+        if self.vendor == 'postgresql':
+            return self.run_search(POSTGRESQL_TITLES, tsquery(self.query))
+        if self.vendor == 'sqlite':
+            return self.run_search(SQLITE_TITLES, fts5_query(self.query))
+        pks = Dictionary.objects\
+            .filter(title__icontains=self.query)\
+            .order_by().values_list('pk', flat=True)[:self.word_limit]
+        return dict.fromkeys(pks, 1)
+
+    def rank(self):
+        """
+        Return list of pks of found dictionaries, the best first,
+        matched words of each dictionary are kept in self.matches
+        """
+        if not self.has_terms():
+            self.matches = {}
+            return []
+        words = self.match_words()
+        titles = self.match_titles()
+        through = Dictionary.word.through
+        found = Dictionary.objects\
+            .filter(available_for(self.user))\
+            .filter(Q(pk__in=titles) | Q(Exists(
+                through.objects.filter(
+                    dictionary=OuterRef('pk'), word_id__in=words
+                )
+            )))\
+            .order_by()\
+            .values_list('pk', 'title')
+        titles_of = dict(found)
+
+        self.matches = defaultdict(list)
+        links = through.objects\
+            .filter(dictionary_id__in=titles_of, word_id__in=words)\
+            .values_list('dictionary_id', 'word_id')
+        for dictionary_id, word_id in links.iterator():
+            self.matches[dictionary_id].append(word_id)
+        for word_ids in self.matches.values():
+            word_ids.sort(key=lambda pk: -words[pk])
+
+        def key(pk):
+            best_word = max(
+                (words[word_id] for word_id in self.matches[pk]), default=0
+            )
+            return -max(2 * titles.get(pk, 0), best_word), titles_of[pk], pk
+        return sorted(titles_of, key=key)
+
+    def ranked(self):
+        if self._ranked is None:
+            self._ranked, self.matches = cached_search(
+                'dictionaries', self.query, self.user,
+                lambda: (self.rank(), dict(self.matches))
+            )
+        return self._ranked
+
+    def count(self):
+        return len(self.ranked())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        return self.fetch(self.ranked()[key])
+
+    def fetch(self, pks):
+        """
+        Return dictionaries of page in order of pks with matched
+        words in highlights attribute
+        """
+        if not pks:
+            return []
+        # ranking may come from cache made before dictionary was hidden
+        dictionaries = Dictionary.detail_objects\
+            .filter(available_for(self.user))\
+            .in_bulk(pks)
+        highlights = {
+            pk: self.matches.get(pk, [])[:self.highlights_size]
+            for pk in pks
+        }
+        words = Word.objects.in_bulk(chain(*highlights.values()))
+        for pk, dictionary in dictionaries.items():
+            dictionary.highlights = [
+                words[word_id] for word_id in highlights[pk]
+            ]
+        return [dictionaries[pk] for pk in pks if pk in dictionaries]
+
+
+# fuzzy search of words with typos by trigram indexes of migration
+# 0009_trigram_index, similarity threshold of '%' operator is pg_trgm
+# default 0.3
+POSTGRESQL_FUZZY = f"""
+    SELECT w.id, GREATEST(
+        similarity(w.body, %s), similarity(w.translations, %s)
+    ) AS score
+    FROM dictionary_word w
+    WHERE (w.body %% %s OR w.translations %% %s)
+    AND EXISTS (
+        SELECT 1 FROM dictionary_dictionary_word dw
+        JOIN dictionary_dictionary d ON d.id = dw.dictionary_id
+        WHERE dw.word_id = w.id AND {VISIBLE}
+    )
+    ORDER BY score DESC, w.id
+    LIMIT %s
+"""
+
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text):
+    """
+    Trigrams of words of text padded like pg_trgm does
+    """
+    grams = set()
+    for word in re.findall(r'\w+', text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(first, second):
+    if not first or not second:
+        return 0
+    return len(first & second) / len(first | second)
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index of bodies and translations of words,
+    used for fuzzy search by databases without pg_trgm
+    """
+    def __init__(self, rows):
+        self.words = {}
+        self.postings = defaultdict(set)
+        for pk, body, translations in rows:
+            grams = (trigrams(body), trigrams(translations))
+            self.words[pk] = grams
+            for gram in grams[0] | grams[1]:
+                self.postings[gram].add(pk)
+
+    def search(self, query, threshold=SIMILARITY_THRESHOLD):
+        """
+        Return (pk, similarity) of words similar to query,
+        the most similar first
+        """
+        grams = trigrams(query)
+        candidates = set().union(*(
+            self.postings.get(gram, ()) for gram in grams
+        ))
+        results = []
+        for pk in candidates:
+            score = max(similarity(grams, other) for other in self.words[pk])
+            if score >= threshold:
+                results.append((pk, score))
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results
+
+
+_trigram_index = None
+_trigram_index_key = None
+
+
+def get_trigram_index():
+    """
+    Return trigram index of all words, it's rebuilt when words
+    were inserted or deleted since the last build
+    """
+    global _trigram_index, _trigram_index_key
+    key = Word.objects.aggregate(count=Count('pk'), last=Max('pk'))
+    if _trigram_index is None or key != _trigram_index_key:
+        _trigram_index = TrigramIndex(
+            Word.objects.values_list('pk', 'body', 'translations')
+            .order_by().iterator()
+        )
+        _trigram_index_key = key
+    return _trigram_index
+
+
+def fuzzy_search(query, user, limit=20):
+    """
+    Search words tolerating typos, return words ranked by similarity
+    with the dictionaries available for user, which contain them:
+        - Postgres ranks words by pg_trgm indexes
+        - other databases use in-memory TrigramIndex
+        - results are cached, see cached_search()
+    Each result is dict with 'word', 'similarity' and 'dictionaries'
+    """
+    results = cached_search(
+        f'words:{limit}', query, user,
+        lambda: search_similar_words(query, user, limit)
+    )
+    # cached dictionaries may be hidden since then
+    visible = set(
+        Dictionary.objects
+        .filter(available_for(user), pk__in={
+            dictionary.pk
+            for result in results
+            for dictionary in result['dictionaries']
+        })
+        .values_list('pk', flat=True)
+    )
+    results = [
+        dict(result, dictionaries=[
+            dictionary for dictionary in result['dictionaries']
+            if dictionary.pk in visible
+        ])
+        for result in results
+    ]
+    return [result for result in results if result['dictionaries']]
+
+
+def search_similar_words(query, user, limit):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                POSTGRESQL_FUZZY,
+                [query] * 4 + [user.id, limit]
+            )
+            ranked = cursor.fetchall()
+    else:
+        ranked = get_trigram_index().search(query)
+
+    available = available_for(user, prefix='dictionary__')
+    results = []
+    # words of private dictionaries of other users are skipped
+    for start in range(0, len(ranked), limit):
+        chunk = dict(ranked[start:start + limit])
+        dictionaries = defaultdict(list)
+        links = Dictionary.word.through.objects\
+            .filter(available, word_id__in=chunk)\
+            .select_related('dictionary')\
+            .order_by('dictionary__title')
+        for link in links:
+            dictionaries[link.word_id].append(link.dictionary)
+        words = Word.objects.in_bulk(dictionaries)
+        for pk, score in chunk.items():
+            if pk in words:
+                results.append({
+                    'word': words[pk],
+                    'similarity': score,
+                    'dictionaries': dictionaries[pk],
+                })
+        if len(results) >= limit:
+            break
+    return results[:limit]
@@ -0,0 +1,95 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+)
+from django.dispatch import Signal, receiver
+
+from dictionary import autocomplete
+from dictionary.search import invalidate_search_cache
+from dictionary.models import Dictionary, Word
+
+
+# sent by BulkImporter when words are linked to dictionary in bulk,
+# m2m_changed isn't sent for rows of m2m table created in bulk
+words_linked = Signal()
+
+
+COUNTERS = {
+    Dictionary.word.through: ('word', 'word_count'),
+    Dictionary.student.through: ('student', 'student_count'),
+}
+
+
+def update_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Recount counter of dictionaries whose words or students were
+    changed by add(), remove() or clear() of related managers
+    """
+    relation, field = COUNTERS[sender]
+    if reverse and action == 'pre_clear':
+        # dictionaries are unknown after clear from the other side
+        instance._cleared_dictionaries = list(
+            Dictionary.objects
+            .filter(**{relation: instance})
+            .values_list('pk', flat=True)
+        )
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            instance.update_counters(field)
+            return
+        if action == 'post_clear':
+            pk_set = instance.__dict__.pop('_cleared_dictionaries', [])
+        for dictionary in Dictionary.objects.filter(pk__in=pk_set):
+            dictionary.update_counters(field)
+
+
+for through in COUNTERS:
+    m2m_changed.connect(update_counters, sender=through)
+
+
+@receiver(pre_delete, sender=Word)
+def keep_word_dictionaries(sender, instance, **kwargs):
+    """
+    Links of deleted word are removed by cascade without signals,
+    so dictionaries of the word are kept to be updated afterwards
+    """
+    instance._dictionaries = list(
+        instance.dictionary_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Word)
+def update_word_dictionaries(sender, instance, **kwargs):
+    pks = instance.__dict__.pop('_dictionaries', [])
+    for dictionary in Dictionary.objects.filter(pk__in=pks):
+        dictionary.update_counters('word_count')
+
+
+@receiver(words_linked)
+def add_words_to_index(sender, dictionary, word_ids, **kwargs):
+    autocomplete.add_linked_words(dictionary, word_ids)
+
+
+@receiver(post_delete, sender=Word)
+@receiver(post_delete, sender=Dictionary)
+def rebuild_index_after_delete(sender, **kwargs):
+    autocomplete.index.mark_stale()
+
+
+@receiver(post_save, sender=Dictionary)
+def rebuild_index_after_change(sender, created, **kwargs):
+    # status of dictionary may be changed, words of new dictionaries
+    # are added by words_linked
+    if not created:
+        autocomplete.index.mark_stale()
+
+
+@receiver(words_linked)
+@receiver(m2m_changed, sender=Dictionary.word.through)
+@receiver(post_save, sender=Dictionary)
+@receiver(post_delete, sender=Dictionary)
+def invalidate_search_results(sender, **kwargs):
+    # new, changed or deleted dictionary changes visible results
+    invalidate_search_cache()
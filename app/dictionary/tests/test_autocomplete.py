@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.autocomplete import PrefixIndex, index
+from dictionary.helpers import DictionaryFileManager
+from dictionary.models import Dictionary, Word
+
+
+class Autocomplete(BaseTestSettings):
+    """
+    Testcase for testing prefix index and autocomplete view
+    """
+
+    def setUp(self):
+        index.mark_stale()
+        self.create_dictionary()
+
+    def test_PrefixIndex(self):
+        """
+        Testing index is searched by prefixes of bodies and
+        translations, words over the limit of size are skipped
+        """
+        self.new_dict.word.add(
+            Word.objects.create(body='Test_case', translations='пример'),
+            Word.objects.create(body='other', translations='другое'),
+        )
+        prefix_index = PrefixIndex(max_size=100, ttl=60)
+        self.assertEqual(
+            [('test_word', 'слово'), ('Test_case', 'пример')],
+            sorted(prefix_index.search('TEST', 10), reverse=True)
+        )
+        self.assertEqual(
+            [('other', 'другое')], prefix_index.search('друг', 10)
+        )
+        self.assertEqual(1, len(prefix_index.search('test', 1)))
+        self.assertEqual([], prefix_index.search('missing', 10))
+
+        # two keys are body and translations of one word
+        prefix_index = PrefixIndex(max_size=2, ttl=60)
+        self.assertEqual(1, len(prefix_index.search('', 10)))
+
+    def test_PrefixIndex_add(self):
+        """
+        Testing added words are merged into new sorted arrays:
+        - words already in index and repeated words are skipped
+        - words over the limit of size are skipped
+        - arrays read before adding are not changed
+        """
+        prefix_index = PrefixIndex(max_size=6, ttl=60)
+        self.assertEqual(1, len(prefix_index.search('test', 10)))
+        arrays = prefix_index.arrays
+
+        prefix_index.add([
+            ('test_word', 'слово'),
+            ('apple', 'яблоко'),
+            ('apple', 'яблоко'),
+            ('test_case', 'пример'),
+        ])
+        keys, entries = prefix_index.arrays
+        self.assertEqual(sorted(keys), keys)
+        self.assertEqual(6, len(keys))
+        self.assertEqual(len(keys), len(entries))
+        self.assertEqual(
+            ['test_case', 'test_word'],
+            sorted(body for body, _ in prefix_index.search('test', 10))
+        )
+        self.assertEqual([('apple', 'яблоко')], prefix_index.search('ябл', 10))
+        self.assertEqual(['test_word', 'слово'], arrays[0])
+
+        prefix_index.add([('zebra', 'зебра')])
+        self.assertEqual([], prefix_index.search('zeb', 10))
+
+    def test_PrefixIndex_rebuild_once(self):
+        """
+        Testing concurrent searches of expired index rebuild it once
+        """
+        class SlowIndex(PrefixIndex):
+            loads = 0
+
+            def load(self):
+                self.loads += 1
+                time.sleep(0.05)
+                return [('word', ('word', 'слово'))]
+
+        prefix_index = SlowIndex(max_size=10, ttl=60)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(prefix_index.search('w', 10))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, prefix_index.loads)
+        self.assertEqual([[('word', 'слово')]] * 8, results)
+
+        # stale index is rebuilt by one thread, others use the old one
+        prefix_index.mark_stale()
+        prefix_index.rebuild_lock.acquire()
+        self.assertEqual([('word', 'слово')], prefix_index.search('w', 10))
+        prefix_index.rebuild_lock.release()
+        self.assertEqual(1, prefix_index.loads)
+
+    def test_autocomplete(self):
+        """
+        Testing view answers from index without queries to DB:
+        - words of imported public dictionary are added by signal
+        - words of private dictionaries are not suggested
+        - index is rebuilt after words are deleted
+        """
+        url = reverse('dictionary:autocomplete')
+        self.client.get(url, {'query': 'test'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url, {'query': 'test'})
+        self.assertEqual(
+            [{'body': 'test_word', 'translations': 'слово'}],
+            res.json()['results']
+        )
+
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        with open(sample_file, 'rb') as file,\
+                self.captureOnCommitCallbacks(execute=True):
+            DictionaryFileManager(file).parse_file(
+                Dictionary(author=self.user_auth, status='public')
+            )
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'query': 'vacat'})
+        self.assertFalse(any(
+            'dictionary_word' in query['sql'] for query in queries
+        ))
+        self.assertEqual('vacation', res.json()['results'][0]['body'])
+
+        self.new_dict.status = 'private'
+        self.new_dict.save()
+        res = self.client.get(url, {'query': 'test'})
+        self.assertEqual([], res.json()['results'])
+
+        Word.objects.filter(body='vacation').delete()
+        res = self.client.get(url, {'query': 'vacat'})
+        self.assertEqual([], res.json()['results'])
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.cache import LRUFileBasedCache
+
+
+class LRUCache(BaseTestSettings):
+    """
+    Testcase for testing file-based cache of search results
+    """
+
+    def test_cull_least_recently_used(self):
+        """
+        Testing entries read recently are kept when cache is full,
+        the least recently used ones are culled
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            location = os.path.join(tmp_dir, 'search')
+            cache = LRUFileBasedCache(location, {
+                'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3},
+            })
+            # directory is created by the first write
+            self.assertIsNone(cache.get('first'))
+            self.assertFalse(os.path.exists(location))
+            for number, key in enumerate(('first', 'second', 'third')):
+                cache.set(key, number)
+                # mtime of files differs, however fast they are written
+                os.utime(cache._key_to_file(key), (number, number))
+
+            self.assertEqual(0, cache.get('first'))
+            cache.set('fourth', 3)
+
+            self.assertEqual(0, cache.get('first'))
+            self.assertIsNone(cache.get('second'))
+            self.assertEqual(2, cache.get('third'))
+            self.assertEqual(3, cache.get('fourth'))
+            self.assertEqual('missing', cache.get('fifth', 'missing'))
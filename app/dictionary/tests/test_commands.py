@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.models import Dictionary, ImportJob, Word
+
+
+class DictionaryCounters(BaseTestSettings):
+    """
+    Testcase for testing persisted counters of dictionaries
+    """
+
+    def setUp(self):
+        self.create_dictionary()
+        self.create_additional_user()
+
+    def test_counters(self):
+        """
+        Testing counters follow words and students of dictionary:
+        - linking by related managers from both sides
+        - deleting of word
+        """
+        self.new_dict.refresh_from_db()
+        self.assertEqual(1, self.new_dict.word_count)
+
+        self.new_dict.student.add(self.user_auth, self.new_auth_user)
+        self.assertEqual(2, self.new_dict.student_count)
+        self.new_auth_user.dictionary_set.clear()
+        self.new_dict.refresh_from_db()
+        self.assertEqual(1, self.new_dict.student_count)
+
+        self.new_word.delete()
+        self.new_dict.refresh_from_db()
+        self.assertEqual(0, self.new_dict.word_count)
+
+    def test_repair_dictionary_counters(self):
+        """
+        Testing command recounts counters changed bypassing signals
+        """
+        Dictionary.word.through.objects.create(
+            dictionary=self.new_dict,
+            word=Word.objects.create(body='second', translations='второе')
+        )
+        Dictionary.objects.update(word_count=0, student_count=5)
+
+        out = StringIO()
+        call_command('repair_dictionary_counters', previews=True, stdout=out)
+
+        self.new_dict.refresh_from_db()
+        self.assertEqual(2, self.new_dict.word_count)
+        self.assertEqual(0, self.new_dict.student_count)
+        self.assertEqual(
+            [['second', 'второе'], ['test_word', 'слово']],
+            self.new_dict.preview
+        )
+        self.assertIn('Counters of 1 dictionaries recounted', out.getvalue())
+
+
+class OrphanWords(BaseTestSettings):
+    """
+    Testcase for testing removal of words left by failed imports
+    """
+
+    def setUp(self):
+        self.create_dictionary()
+
+    def test_delete_orphan_words(self):
+        """
+        Testing only old words without dictionaries are deleted:
+        - word of dictionary is kept
+        - recent orphan is kept
+        - nothing is deleted while import job is running, it may
+        have fetched any orphan to link it at its end
+        """
+        old, recent = Word.objects.bulk_create([
+            Word(body='old', translations='старое'),
+            Word(body='recent', translations='новое'),
+        ])
+        Word.objects.filter(pk__in=[old.pk, self.new_word.pk])\
+            .update(created=timezone.now() - timedelta(days=2))
+
+        job = ImportJob.objects.create(
+            author=self.user_auth, file='file/job.xml', status='running'
+        )
+        out = StringIO()
+        call_command('delete_orphan_words', stdout=out)
+        self.assertTrue(Word.objects.filter(pk=old.pk).exists())
+        self.assertIn('Stopped, import jobs are running', out.getvalue())
+
+        job.status = 'done'
+        job.save()
+        out = StringIO()
+        call_command('delete_orphan_words', stdout=out)
+
+        self.assertFalse(Word.objects.filter(pk=old.pk).exists())
+        self.assertTrue(Word.objects.filter(pk=recent.pk).exists())
+        self.assertTrue(Word.objects.filter(pk=self.new_word.pk).exists())
+        self.assertIn('Deleted 1 orphan words', out.getvalue())
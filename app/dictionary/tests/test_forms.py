@@ -1,9 +1,15 @@
 import os
+import tempfile
+from unittest import mock
 
 from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 
 from core.tests.base_settings import BaseTestSettings
+from dictionary.management.commands.benchmark_import import \
+    write_lt_dictionary
+from dictionary.helpers import DictionaryFileManager
 from dictionary.models import Dictionary
 
 
@@ -60,7 +66,12 @@ class TestDictionary(BaseTestSettings):
         with open(sample_file, 'rb') as fp:
             res = self.client_auth.post(
                 url,
-                {'note': 'invalid_file', 'status': 'public', 'file': fp}
+                {
+                    'author': self.user_auth.pk,
+                    'note': 'invalid_file',
+                    'status': 'public',
+                    'file': fp
+                }
             )
         self.assertEqual(200, res.status_code)
         self.assertEqual(0, len(Dictionary.objects.all()))
@@ -70,4 +81,83 @@ class TestDictionary(BaseTestSettings):
             'Загруженный файл не был распознан',
             res.context.get('form').errors.get('file')[0],
         )
+        # file stored by rolled back dictionary is deleted
+        stored = [
+            name for _, _, names in os.walk(settings.MEDIA_ROOT)
+            for name in names if name.startswith('invalid_file')
+        ]
+        self.assertEqual([], stored)
         # import ipdb; ipdb.set_trace()
+
+    def upload(self, file):
+        return self.client_auth.post(
+            reverse('dictionary:upload_file'),
+            {
+                'author': self.user_auth.pk,
+                'note': 'large file',
+                'status': 'public',
+                'file': file
+            }
+        )
+
+    def test_DictionaryForm_parse_once(self):
+        """
+        Testing uploaded file is parsed once, by saving of the form
+        """
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        with mock.patch.object(
+            DictionaryFileManager,
+            'iter_xml',
+            autospec=True,
+            side_effect=DictionaryFileManager.iter_xml,
+        ) as iter_xml, open(sample_file, 'rb') as fp:
+            res = self.upload(fp)
+
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(1, iter_xml.call_count)
+        self.assertEqual(25, Dictionary.objects.get().word_count)
+
+    def test_DictionaryForm_large_xml(self):
+        """
+        Testing form saves all cards of xml file larger than chunks
+        read by parser and by storage of uploaded file
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'large.xml')
+            write_lt_dictionary(path, 1000)
+            self.assertGreater(os.path.getsize(path), 64 * 1024)
+            with open(path, 'rb') as fp:
+                res = self.upload(fp)
+
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(reverse('dictionary:my_dictionaries'), res.url)
+        dictionary = Dictionary.objects.get()
+        self.assertEqual('Benchmark 1000', dictionary.title)
+        self.assertEqual(1000, dictionary.word_count)
+        self.assertEqual(1000, dictionary.word.count())
+
+    def test_DictionaryForm_large_csv(self):
+        """
+        Testing form saves all rows of csv files larger than chunks
+        read by parser: ascii and utf-8 with multibyte chars
+        """
+        for number, translation in enumerate(('word', 'слово')):
+            content = ''.join(
+                f'word {i};{translation} {i}\n' for i in range(20000)
+            )
+            large_file = SimpleUploadedFile(
+                f'large_{number}.csv', content.encode('utf-8')
+            )
+            self.assertGreater(large_file.size, 64 * 1024)
+            res = self.upload(large_file)
+
+            self.assertEqual(302, res.status_code)
+            self.assertEqual(reverse('dictionary:my_dictionaries'), res.url)
+            dictionary = Dictionary.objects.get(title=f'large_{number}')
+            self.assertEqual(20000, dictionary.word_count)
+            self.assertTrue(dictionary.word.filter(
+                body='word 19999', translations=f'{translation} 19999'
+            ).exists())
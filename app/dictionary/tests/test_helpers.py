@@ -1,10 +1,13 @@
 import os
 
 from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from core.tests.base_settings import BaseTestSettings
 from dictionary.helpers import DictionaryFileManager
-from dictionary.models import Dictionary
+from dictionary.models import Dictionary, Word
 
 
 class TestDictionary(BaseTestSettings):
@@ -80,7 +83,7 @@ class TestDictionary(BaseTestSettings):
 
     def test_DictionaryFileManager_csv_file(self):
         """
-        Testing helper which handling uploaded invalid csv_file
+        Testing helper which handling uploaded csv_file
         """
 
         sample_file = os.path.join(
@@ -93,7 +96,86 @@ class TestDictionary(BaseTestSettings):
             instance = DictionaryFileManager(file)
             res = instance.parse_file(obj=obj)
 
-        self.assertIsNone(res)
+        # check number of inserted words, title, and columns of word
+        self.assertIsNotNone(res)
+        self.assertEqual(8, res.word.count())
+        self.assertEqual('csv_file', res.title)
+        word = res.word.get(body='curve')
+        self.assertEqual(
+            'полет по криволинейной траектории',
+            word.translations
+        )
+        self.assertEqual('', word.example)
+
+    def test_DictionaryFileManager_utf16_csv_file(self):
+        """
+        Testing helper which handling uploaded utf-16 file with tabs
+        """
+
+        content = (
+            'word\ttranscription\ttranslation\texample\r\n'
+            'summer\t\'sʌmə\tлето\tin summer — летом\r\n'
+            'souvenir\t,suːv(ə)\'nɪə\tсувенир\t\r\n'
+        )
+        uploaded_file = SimpleUploadedFile(
+            'Summer words.csv',
+            content.encode('utf-16')
+        )
+
+        obj = Dictionary.objects.create(author=self.user)
+        instance = DictionaryFileManager(uploaded_file)
+        instance.chunk_size = 16
+        self.assertIsNotNone(instance.csv())
+        res = instance.parse_file(obj=obj)
+
+        self.assertIsNotNone(res)
+        self.assertEqual(2, res.word.count())
+        self.assertEqual('Summer words', res.title)
+        word = res.word.get(body='summer')
+        self.assertEqual('лето', word.translations)
+        self.assertEqual('in summer — летом', word.example)
+
+    def test_DictionaryFileManager_utf16_csv_file_without_bom(self):
+        """
+        Testing helper which handling uploaded utf-16 files without BOM
+        in both byte orders
+        """
+        content = (
+            'word\ttranscription\ttranslation\texample\r\n'
+            'summer\t\'sʌmə\tлето\tin summer — летом\r\n'
+            'souvenir\t,suːv(ə)\'nɪə\tсувенир\t\r\n'
+        )
+        for encoding in ('utf-16-le', 'utf-16-be'):
+            uploaded_file = SimpleUploadedFile(
+                f'Summer {encoding}.csv',
+                content.encode(encoding)
+            )
+            obj = Dictionary.objects.create(author=self.user)
+            instance = DictionaryFileManager(uploaded_file)
+            self.assertIsNotNone(instance.clean_file())
+            res = instance.parse_file(obj=obj)
+
+            self.assertIsNotNone(res)
+            self.assertEqual(
+                {
+                    ('summer', 'лето', 'in summer — летом'),
+                    ('souvenir', 'сувенир', ''),
+                },
+                set(res.word.values_list('body', 'translations', 'example'))
+            )
+
+    def test_DictionaryFileManager_invalid_csv_file(self):
+        """
+        Testing helper which handling uploaded csv file without words
+        """
+
+        uploaded_file = SimpleUploadedFile(
+            'invalid_file.csv',
+            'одна колонка\nбез перевода\n'.encode('cp1251')
+        )
+        instance = DictionaryFileManager(uploaded_file)
+
+        self.assertIsNone(instance.clean_file())
 
     def test_DictionaryFileManager_parse_valid_xml(self):
         """
@@ -112,6 +194,7 @@ class TestDictionary(BaseTestSettings):
         # check number of inserted words, title, and slug
         self.assertIsNotNone(res)
         self.assertEqual(25, res.word.count())
+        self.assertEqual(25, res.word_count)
         self.assertEqual('Test 2022.07.13', res.title)
         self.assertEqual('test-2022-07-13', res.slug)
 
@@ -135,4 +218,104 @@ class TestDictionary(BaseTestSettings):
         self.assertEqual('Без имени', res.title)
         self.assertEqual('bez-imeni', res.slug)
 
+    def test_DictionaryFileManager_parse_in_batches(self):
+        """
+        Testing words are inserted by one query per batch
+        """
+
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        obj = Dictionary.objects.create(author=self.user)
+        with open(sample_file, 'rb') as file:
+            instance = DictionaryFileManager(file)
+            instance.batch_size = 10
+            with CaptureQueriesContext(connection) as queries:
+                res = instance.parse_file(obj=obj)
+
+        # 3 batches: words and links to dictionary for each of them
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT')
+        ]
+        self.assertEqual(6, len(inserts))
+        self.assertEqual(25, res.word.count())
+
+    def test_DictionaryFileManager_parse_broken_file(self):
+        """
+        Testing nothing is saved if file breaks in the middle
+        """
+
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        with open(sample_file, 'rb') as file:
+            content = file.read()
+        # cut the file in the middle keeping utf-16 code units whole
+        broken_file = SimpleUploadedFile(
+            'broken_file.xml',
+            content[:len(content) // 4 * 2]
+        )
+
+        obj = Dictionary(author=self.user)
+        instance = DictionaryFileManager(broken_file)
+        instance.batch_size = 5
+        res = instance.parse_file(obj=obj)
+
+        self.assertIsNone(res)
+        self.assertEqual(0, len(Dictionary.objects.all()))
+        self.assertEqual(0, len(Word.objects.all()))
+
+    def test_DictionaryFileManager_clean_keeps_no_cards(self):
+        """
+        Testing clean_file keeps only title, parse_file streams
+        the file again
+        """
+
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        obj = Dictionary.objects.create(author=self.user)
+        with open(sample_file, 'rb') as file:
+            instance = DictionaryFileManager(file)
+            self.assertIsNotNone(instance.clean_file())
+            self.assertIsNone(instance.cards)
+            self.assertEqual('Test 2022.07.13', instance.title)
+            res = instance.parse_file(obj=obj)
+
+        self.assertIsNotNone(res)
+        self.assertEqual(25, res.word.count())
+        self.assertEqual('Test 2022.07.13', res.title)
+
+    def test_DictionaryFileManager_canonical_words(self):
+        """
+        Testing words of different files with the same cards
+        are stored once and shared by dictionaries
+        """
+
+        for file_name in (
+            'valid_dict_file.xml',
+            'valid_dict_file_without_name.xml'
+        ):
+            sample_file = os.path.join(
+                settings.BASE_DIR,
+                'core/tests/sample_file',
+                file_name
+            )
+            obj = Dictionary.objects.create(author=self.user)
+            with open(sample_file, 'rb') as file:
+                res = DictionaryFileManager(file).parse_file(obj=obj)
+            self.assertEqual(25, res.word.count())
+
+        first, second = Dictionary.objects.order_by('pk')
+        self.assertNotEqual(first.file_hash, second.file_hash)
+        self.assertEqual(25, len(Word.objects.all()))
+        self.assertEqual(
+            0,
+            len(Word.objects.filter(content_hash__isnull=True))
+        )
+
 # import ipdb; ipdb.set_trace()
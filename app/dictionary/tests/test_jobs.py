@@ -0,0 +1,146 @@
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.models import Dictionary, ImportJob, Word
+
+
+class ImportJobs(BaseTestSettings):
+    """
+    Testcase for testing background import of dictionaries
+    """
+
+    def upload_in_background(self, file_name):
+        url = reverse(
+            'dictionary:upload_file'
+        )
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file',
+            file_name
+        )
+        with open(sample_file, 'rb') as fp:
+            res = self.client_auth.post(
+                url,
+                {
+                    'author': self.user_auth.pk,
+                    'note': 'test file',
+                    'status': 'public',
+                    'background': 'on',
+                    'file': fp
+                }
+            )
+        return res
+
+    def test_queue_job(self):
+        """
+        Testing background upload queues job and returns right away:
+        - no dictionary is created by request
+        - redirect back to upload page to watch progress
+        """
+        res = self.upload_in_background('valid_dict_file.xml')
+
+        job = ImportJob.objects.latest('created')
+        url_redirect = reverse('dictionary:upload_file') + f'?job={job.pk}'
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(url_redirect, res.url)
+        self.assertEqual('queued', job.status)
+        self.assertEqual(0, len(Dictionary.objects.all()))
+
+        res = self.client_auth.get(url_redirect)
+        self.assertEqual(200, res.status_code)
+        self.assertEqual(job, res.context.get('job'))
+
+    def test_process_job(self):
+        """
+        Testing worker imports queued job and progress is reported
+        """
+        self.upload_in_background('valid_dict_file.xml')
+        call_command('process_import_jobs', once=True)
+
+        job = ImportJob.objects.latest('created')
+        self.assertEqual('done', job.status)
+        self.assertEqual(25, job.cards_parsed)
+        self.assertEqual(25, job.cards_inserted)
+        self.assertEqual('Test 2022.07.13', job.dictionary.title)
+        self.assertEqual('test file', job.dictionary.note)
+        self.assertEqual('public', job.dictionary.status)
+        self.assertEqual(25, job.dictionary.word.count())
+
+        url = reverse(
+            'dictionary:import_job_status',
+            kwargs={'pk': job.pk}
+        )
+        res = self.client_auth.get(url)
+        self.assertEqual(200, res.status_code)
+        self.assertEqual('done', json.loads(res.content).get('status'))
+        self.assertEqual(25, json.loads(res.content).get('cards_inserted'))
+
+        # progress is available only for author of job
+        self.create_additional_user()
+        res = self.client_new_auth_user.get(url)
+        self.assertEqual(404, res.status_code)
+
+    def test_process_invalid_job(self):
+        """
+        Testing worker keeps error of invalid file and inserts nothing
+        """
+        self.upload_in_background('dict_file_with_invalid_structure.xml')
+        call_command('process_import_jobs', once=True)
+
+        job = ImportJob.objects.latest('created')
+        self.assertEqual('failed', job.status)
+        self.assertEqual('Загруженный файл не был распознан', job.error)
+        self.assertIsNone(job.dictionary)
+        self.assertEqual(0, len(Dictionary.objects.all()))
+        self.assertEqual(0, len(Word.objects.all()))
+
+    def test_process_duplicate_job(self):
+        """
+        Testing worker reuses file and words of the same upload
+        """
+        self.upload_in_background('valid_dict_file.xml')
+        call_command('process_import_jobs', once=True)
+        self.upload_in_background('valid_dict_file.xml')
+        call_command('process_import_jobs', once=True)
+
+        first, second = ImportJob.objects.all()
+        self.assertEqual('done', second.status)
+        self.assertEqual(25, second.cards_inserted)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.name, second.dictionary.file.name)
+        self.assertEqual(2, len(Dictionary.objects.all()))
+        self.assertEqual(25, len(Word.objects.all()))
+
+    def test_reclaim_abandoned_job(self):
+        """
+        Testing worker takes again running job of dead worker:
+        - job without saved progress for timeout is imported anew
+        - job with recent progress is left to its worker
+        """
+        self.upload_in_background('valid_dict_file.xml')
+        job = ImportJob.objects.latest('created')
+        ImportJob.objects.filter(pk=job.pk).update(
+            status='running', cards_parsed=10, cards_inserted=10
+        )
+        call_command('process_import_jobs', once=True)
+        job.refresh_from_db()
+        self.assertEqual('running', job.status)
+        self.assertEqual(10, job.cards_parsed)
+
+        ImportJob.objects.filter(pk=job.pk).update(
+            updated=timezone.now() - timedelta(
+                seconds=settings.IMPORT_JOB_TIMEOUT + 1
+            )
+        )
+        call_command('process_import_jobs', once=True)
+        job.refresh_from_db()
+        self.assertEqual('done', job.status)
+        self.assertEqual(25, job.cards_parsed)
+        self.assertEqual(25, job.dictionary.word.count())
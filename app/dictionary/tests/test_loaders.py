@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.loaders import get_loader
+from dictionary.models import Dictionary
+from lesson.models import Card, Lesson
+
+
+class RequestLoaderTest(BaseTestSettings):
+    """
+    Testcase for testing request-scoped loader of objects
+    """
+
+    def setUp(self):
+        self.create_dictionary()
+        self.lesson = Lesson.objects.create(
+            dictionary=self.new_dict, student=self.user_auth
+        )
+        self.lesson.create_cards()
+
+    def test_identity(self):
+        """
+        Testing every object is loaded once per request:
+        - dictionary of lesson and lesson of card are shared
+        - missing objects and invalid pks give None
+        """
+        request = RequestFactory().get('/')
+        loader = get_loader(request)
+        self.assertIs(loader, get_loader(request))
+
+        card = Card.objects.filter(lesson=self.lesson).first()
+        # card, its lesson with dictionary and missing dictionary
+        with self.assertNumQueries(3):
+            loaded_card = loader.card(card.pk)
+            lesson = loader.lesson(str(self.lesson.pk))
+            dictionary = loader.dictionary(self.new_dict.pk)
+            self.assertIsNone(loader.dictionary(0))
+            self.assertIsNone(loader.dictionary(0))
+            self.assertIsNone(loader.lesson('invalid'))
+        self.assertIs(lesson, loaded_card.lesson)
+        self.assertIs(dictionary, lesson.dictionary)
+        self.assertEqual(self.user_auth, dictionary.author)
+
+        # loader doesn't outlive request
+        with self.assertNumQueries(1):
+            get_loader(RequestFactory().get('/')).dictionary(dictionary.pk)
+
+    def test_change_status(self):
+        """
+        Testing dictionary is loaded once by author_required and view,
+        the other query is validation of ChoiceDictionaryForm
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client_auth.post(
+                reverse('dictionary:change_status'),
+                {'dictionary_pk': self.new_dict.pk},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith(
+                'SELECT "dictionary_dictionary"."id"'
+            )
+        ]
+        self.assertEqual(2, len(selects))
+        self.assertEqual(
+            'private', Dictionary.objects.get(pk=self.new_dict.pk).status
+        )
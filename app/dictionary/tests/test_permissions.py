@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.permissions import can_learn, is_author, is_student
+
+
+class Permissions(BaseTestSettings):
+    """
+    Testcase for testing permission checks of dictionaries
+    """
+
+    def setUp(self):
+        self.create_dictionary()
+        self.create_additional_user()
+        self.students = get_user_model().objects.bulk_create(
+            get_user_model()(
+                username=f'student_{i}', email=f'student_{i}@example.com'
+            ) for i in range(50)
+        )
+        self.new_dict.student.add(self.new_auth_user, *self.students)
+
+    def test_author(self):
+        """
+        Testing only author can edit dictionary
+        """
+        self.assertTrue(is_author(self.user_auth, self.new_dict))
+        self.assertFalse(is_author(self.new_auth_user, self.new_dict))
+        self.assertFalse(is_author(AnonymousUser(), self.new_dict))
+        self.assertFalse(is_author(self.user_auth, None))
+
+    def test_learn(self):
+        """
+        Testing author and students of public dictionary can learn it
+        by one query at most however many students dictionary has
+        """
+        with self.assertNumQueries(0):
+            self.assertTrue(can_learn(self.user_auth, self.new_dict))
+        with self.assertNumQueries(1):
+            self.assertTrue(can_learn(self.new_auth_user, self.new_dict))
+        self.assertFalse(can_learn(AnonymousUser(), self.new_dict))
+        self.assertFalse(can_learn(self.new_auth_user, None))
+        self.assertTrue(is_student(self.new_auth_user, self.new_dict.pk))
+        self.assertFalse(is_student(self.user_auth, self.new_dict.pk))
+
+        # students can't learn private dictionary
+        self.new_dict.status = 'private'
+        self.assertFalse(can_learn(self.new_auth_user, self.new_dict))
+        self.assertTrue(can_learn(self.user_auth, self.new_dict))
@@ -1,11 +1,20 @@
+import io
 import os
+import zipfile
 
 from django.conf import settings
-
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from core.tests.base_settings import BaseTestSettings
+from dictionary.helpers import ArchiveManager, DictionaryFileManager
 from dictionary.models import Dictionary, Word
+from lesson.models import Card, Lesson
 
 
 class AddDictionaryView(BaseTestSettings):
@@ -84,6 +93,45 @@ class AddDictionaryView(BaseTestSettings):
             Dictionary.objects.latest('created').slug,
         )
 
+    def test_AddDictionaryView_same_file_twice(self):
+        """
+        Testing the second upload of the same file reuses stored file
+        and words of the first dictionary
+        """
+        url = reverse(
+            'dictionary:upload_file'
+        )
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+
+        for note in ('first file', 'second file'):
+            with open(sample_file, 'rb') as fp:
+                res = self.client_auth.post(
+                    url,
+                    {
+                        'author': self.user_auth.pk,
+                        'note': note,
+                        'status': 'public',
+                        'file': fp
+                    }
+                )
+            self.assertEqual(302, res.status_code)
+
+        first = Dictionary.objects.get(note='first file')
+        second = Dictionary.objects.get(note='second file')
+        self.assertEqual(2, len(Dictionary.objects.all()))
+        self.assertEqual(25, len(Word.objects.all()))
+        self.assertEqual(64, len(second.file_hash))
+        self.assertEqual(first.file_hash, second.file_hash)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual('Test 2022.07.13', second.title)
+        self.assertEqual(
+            set(first.word.values_list('pk', flat=True)),
+            set(second.word.values_list('pk', flat=True)),
+        )
+
     def test_AddDictionaryView_auth_invalid_files(self):
         """
         Testing creating dictionary by authenticated user with invalid files
@@ -122,6 +170,7 @@ class AddDictionaryView(BaseTestSettings):
         url = reverse(
             'dictionary:upload_file'
         )
+        url_redirect = reverse('dictionary:my_dictionaries')
         sample_file = os.path.join(
             settings.BASE_DIR,
             'core/tests/sample_file/csv_file.csv'
@@ -138,13 +187,168 @@ class AddDictionaryView(BaseTestSettings):
                 }
             )
 
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(url_redirect, res.url)
+        self.assertEqual(
+            'csv_file',
+            Dictionary.objects.latest('created').title,
+        )
+        self.assertEqual(
+            8,
+            Dictionary.objects.latest('created').word.count(),
+        )
+
+
+class AddArchiveView(BaseTestSettings):
+    """
+    Testcase for testing upload of zip archive of dictionaries
+    """
+
+    def make_archive(self, *file_names):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            for file_name in file_names:
+                zip_file.write(
+                    os.path.join(
+                        settings.BASE_DIR,
+                        'core/tests/sample_file',
+                        file_name
+                    ),
+                    f'dictionaries/{file_name}'
+                )
+        archive.seek(0)
+        archive.name = 'dictionaries.zip'
+        return archive
+
+    def test_AddArchiveView_auth(self):
+        """
+        Testing creating dictionaries from all files of archive:
+        - valid xml and csv files are imported
+        - invalid file is skipped and reported
+        """
+        url = reverse(
+            'dictionary:upload_archive'
+        )
+        url_redirect = reverse('dictionary:my_dictionaries')
+        archive = self.make_archive(
+            'valid_dict_file.xml',
+            'csv_file.csv',
+            'invalid_file.xml',
+            'invalid_extension.jpg',
+        )
+
+        res = self.client_auth.post(
+            url,
+            {'note': 'archive', 'status': 'public', 'archive': archive}
+        )
+
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(url_redirect, res.url)
+        self.assertEqual(2, len(Dictionary.objects.all()))
+        self.assertEqual(
+            25,
+            Dictionary.objects.get(title='Test 2022.07.13').word.count()
+        )
+        self.assertEqual(
+            8,
+            Dictionary.objects.get(title='csv_file').word.count()
+        )
+        self.assertEqual(
+            {self.user_auth},
+            {dictionary.author for dictionary in Dictionary.objects.all()}
+        )
+        messages = [str(message) for message in res.wsgi_request._messages]
+        self.assertIn('Загружено словарей: 2', messages)
+        self.assertIn('Не были распознаны файлы: invalid_file.xml', messages)
+
+    def test_AddArchiveView_without_dictionaries(self):
+        """
+        Testing archive without dictionaries is not accepted
+        """
+        url = reverse(
+            'dictionary:upload_archive'
+        )
+        archive = self.make_archive('invalid_extension.jpg')
+
+        res = self.client_auth.post(
+            url,
+            {'note': 'archive', 'status': 'public', 'archive': archive}
+        )
+
         self.assertEqual(200, res.status_code)
-        self.assertTrue(res.context.get('form').is_bound)
         self.assertFalse(res.context.get('form').is_valid())
         self.assertEqual(
-            'Загруженный файл не был распознан',
-            res.context.get('form').errors.get('file')[0]
+            'В архиве не найдено словарей',
+            res.context.get('form').errors.get('archive')[0]
+        )
+        self.assertEqual(0, len(Dictionary.objects.all()))
+
+    def test_AddArchiveView_over_limits(self):
+        """
+        Testing archive over limits is rejected before unpacking:
+        - too large file of dictionary
+        - too many files
+        - too large total size of files
+        """
+        url = reverse(
+            'dictionary:upload_archive'
         )
+        file_size = os.path.getsize(os.path.join(
+            settings.BASE_DIR, 'core/tests/sample_file/valid_dict_file.xml'
+        ))
+        cases = [
+            (
+                {'ARCHIVE_MEMBER_MAX_SIZE': file_size - 1},
+                'Файл valid_dict_file.xml больше 0 МБ'
+            ),
+            ({'ARCHIVE_MAX_MEMBERS': 1}, 'В архиве больше 1 словарей'),
+            (
+                {'ARCHIVE_MAX_TOTAL_SIZE': file_size},
+                'Распакованный архив больше 0 МБ'
+            ),
+        ]
+        for limits, error in cases:
+            archive = self.make_archive('valid_dict_file.xml', 'csv_file.csv')
+            with self.subTest(limits=limits), override_settings(**limits):
+                res = self.client_auth.post(
+                    url,
+                    {'note': 'archive', 'status': 'public', 'archive': archive}
+                )
+                self.assertEqual(200, res.status_code)
+                self.assertEqual(
+                    error, res.context.get('form').errors.get('archive')[0]
+                )
+        self.assertEqual(0, len(Dictionary.objects.all()))
+
+    def test_ArchiveManager_bounded_read(self):
+        """
+        Testing file larger than limit is skipped while reading even
+        if archive passed the check
+        """
+        archive = self.make_archive('valid_dict_file.xml', 'csv_file.csv')
+        manager = ArchiveManager(archive)
+        self.assertTrue(manager.clean_archive())
+
+        with override_settings(ARCHIVE_MEMBER_MAX_SIZE=1000):
+            names = [name for name, content in manager.iter_members()]
+        self.assertEqual(['csv_file.csv'], names)
+        self.assertEqual(['valid_dict_file.xml'], manager.skipped)
+
+    def test_ArchiveManager_workers_not_forked(self):
+        """
+        Testing workers parsing archive don't inherit DB connection
+        of web process, as import is run inside a transaction
+        """
+        with transaction.atomic():
+            self.assertTrue(connection.in_atomic_block)
+            with ArchiveManager.get_executor(1) as executor:
+                inherited = executor.submit(has_connection).result()
+        self.assertFalse(inherited)
+
+
+def has_connection():
+    return connection.connection is not None or \
+        connection.in_atomic_block
 
 
 class Dictionary_detail(BaseTestSettings):
@@ -261,6 +465,9 @@ class AddRemoveDictionary(BaseTestSettings):
         self.assertEqual(
             1, len(Dictionary.objects.latest('created').student.all())
         )
+        self.assertEqual(
+            1, Dictionary.objects.latest('created').student_count
+        )
 
     def test_remove_dictionary(self):
         """
@@ -306,6 +513,9 @@ class AddRemoveDictionary(BaseTestSettings):
         self.assertEqual(
             0, len(Dictionary.objects.latest('created').student.all())
         )
+        self.assertEqual(
+            0, Dictionary.objects.latest('created').student_count
+        )
 
 
 class ChangeStatus(BaseTestSettings):
@@ -398,6 +608,29 @@ class ChangeStatus(BaseTestSettings):
             Dictionary.objects.latest('created').status
         )
 
+    def test_counters_kept(self):
+        """
+        Testing changing status saves only status, so counters
+        recounted by other requests aren't overwritten
+        """
+        url = reverse(
+            'dictionary:change_status'
+        )
+        header = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+        with CaptureQueriesContext(connection) as queries:
+            self.client_auth.post(
+                url,
+                {'dictionary_pk': self.new_dict.pk},
+                **header,
+            )
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "dictionary_dictionary"')
+        ]
+        self.assertEqual(1, len(updates))
+        self.assertNotIn('word_count', updates[0])
+        self.assertNotIn('preview', updates[0])
+
 
 class DeleteDictionary(BaseTestSettings):
     """
@@ -485,3 +718,426 @@ class DeleteDictionary(BaseTestSettings):
         self.assertEqual(
             0, len(Dictionary.objects.all())
         )
+
+
+class ReplaceFile(BaseTestSettings):
+    """
+    Testcase for testing replace_file view
+    """
+
+    def setUp(self):
+        self.create_additional_user()
+        url = reverse(
+            'dictionary:upload_file'
+        )
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        with open(sample_file, 'rb') as fp:
+            self.client_auth.post(
+                url,
+                {
+                    'author': self.user_auth.pk,
+                    'note': 'test file',
+                    'status': 'public',
+                    'file': fp
+                }
+            )
+        self.dictionary = Dictionary.objects.latest('created')
+        self.words = list(self.dictionary.word.order_by('pk'))
+        self.lesson = Lesson.objects.create(
+            student=self.user_auth,
+            dictionary=self.dictionary
+        )
+        Card.objects.bulk_create(
+            Card(lesson=self.lesson, word=word) for word in self.words
+        )
+
+    def make_file(self):
+        """
+        New version of the file: translation of the first word is
+        changed, the last word is removed and a new one is added
+        """
+        sample_file = os.path.join(
+            settings.BASE_DIR,
+            'core/tests/sample_file/valid_dict_file.xml'
+        )
+        with open(sample_file, encoding='utf-16') as fp:
+            content = fp.read()
+        first, last = self.words[0], self.words[-1]
+        content = content.replace(
+            f'<translations><word>{first.translations}</word>',
+            '<translations><word>новый перевод</word>',
+            1
+        )
+        content = content.replace(
+            f'>{last.body}</word>', '>new_word</word>', 1
+        )
+        return SimpleUploadedFile(
+            'valid_dict_file.xml',
+            content.encode('utf-16')
+        )
+
+    def test_negative(self):
+        """
+        Testing file can be replaced only by author of dictionary
+        and only by recognized file
+        """
+        url = reverse(
+            'dictionary:replace_file'
+        )
+        url_redirect = reverse(
+            'lesson:lesson',
+            kwargs={
+                'user_pk': self.new_auth_user.pk,
+                'dictionary_pk': self.dictionary.pk,
+            }
+        )
+        res = self.client_new_auth_user.post(
+            url,
+            {'dictionary_pk': self.dictionary.pk, 'file': self.make_file()}
+        )
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(url_redirect, res.url)
+        self.assertEqual(
+            self.words, list(self.dictionary.word.order_by('pk'))
+        )
+
+        invalid_file = SimpleUploadedFile(
+            'invalid.csv', b'\xff\xfe\x00broken'
+        )
+        res = self.client_auth.post(
+            url,
+            {'dictionary_pk': self.dictionary.pk, 'file': invalid_file}
+        )
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(
+            self.words, list(self.dictionary.word.order_by('pk'))
+        )
+
+    def test_positive(self):
+        """
+        Testing replacing file of dictionary:
+        - unchanged words and their cards are kept
+        - card of changed word keeps progress of the lesson
+        - card of removed word is deleted
+        - card is created for new word in existing lesson
+        """
+        card = Card.objects.get(word=self.words[0])
+        card.correct_answers = 2
+        card.save()
+        url = reverse(
+            'dictionary:replace_file'
+        )
+        url_redirect = reverse(
+            'lesson:lesson',
+            kwargs={
+                'user_pk': self.user_auth.pk,
+                'dictionary_pk': self.dictionary.pk,
+            }
+        )
+
+        res = self.client_auth.post(
+            url,
+            {'dictionary_pk': self.dictionary.pk, 'file': self.make_file()}
+        )
+
+        self.assertEqual(302, res.status_code)
+        self.assertEqual(url_redirect, res.url)
+        words = self.dictionary.word.all()
+        self.assertEqual(len(self.words), len(words))
+        self.assertIn(self.words[1], words)
+        self.assertNotIn(self.words[0], words)
+        self.assertNotIn(self.words[-1], words)
+        cards = Card.objects.filter(lesson=self.lesson)
+        self.assertEqual(len(self.words), len(cards))
+        card = cards.get(word__body=self.words[0].body)
+        self.assertEqual('новый перевод', card.word.translations)
+        self.assertEqual(2, card.correct_answers)
+        self.assertTrue(cards.filter(word__body='new_word').exists())
+        self.assertFalse(cards.filter(word=self.words[-1]).exists())
+        self.dictionary.refresh_from_db()
+        self.assertEqual(len(self.words), self.dictionary.word_count)
+
+    def test_counters_kept(self):
+        """
+        Testing replacing file doesn't overwrite counters changed
+        after dictionary was loaded
+        """
+        dictionary = Dictionary.objects.get(pk=self.dictionary.pk)
+        self.dictionary.student.add(self.new_auth_user)
+
+        manager = DictionaryFileManager(self.make_file())
+        manager.replace_words(dictionary)
+
+        dictionary.refresh_from_db()
+        self.assertEqual(1, dictionary.student_count)
+        self.assertEqual(len(self.words), dictionary.word_count)
+
+
+class DictionarySearch(BaseTestSettings):
+    """
+    Testcase for testing dictionary_search view
+    """
+
+    def setUp(self):
+        caches['search'].clear()
+
+    def add_dictionary(self, title, words):
+        dictionary = Dictionary.objects.create(
+            title=title,
+            status='public',
+            author=self.user_auth
+        )
+        dictionary.word.add(*Word.objects.bulk_create(
+            Word(body=f'{title} {i}', translations='слово')
+            for i in range(words)
+        ))
+        dictionary.student.add(self.user_auth)
+        return dictionary
+
+    def test_counts(self):
+        """
+        Testing numbers of words and students are taken from main query:
+        - counts of each dictionary are right
+        - number of queries doesn't depend on number of dictionaries
+        """
+        url = reverse('dictionary:dictionary_search')
+        self.add_dictionary('first', 3)
+        self.add_dictionary('second', 10)
+
+        with self.assertNumQueries(9):
+            res = self.client_auth.get(url, {'query': 'слово'})
+        counts = [
+            (dictionary.word_count, dictionary.student_count)
+            for dictionary in res.context['page_obj']
+        ]
+        self.assertEqual([(3, 1), (10, 1)], counts)
+
+        self.add_dictionary('third', 5)
+        with self.assertNumQueries(9):
+            self.client_auth.get(url, {'query': 'слово'})
+
+    def test_preview(self):
+        """
+        Testing only preview of words is shown in results:
+        - preview is limited by Dictionary.preview_size
+        - only matched words of the page are loaded as highlights
+        """
+        url = reverse('dictionary:dictionary_search')
+        dictionary = self.add_dictionary('large', 100)
+
+        with self.assertNumQueries(9):
+            res = self.client_auth.get(url, {'query': 'large'})
+
+        dictionary.refresh_from_db()
+        self.assertEqual(100, dictionary.word_count)
+        self.assertEqual(Dictionary.preview_size, len(dictionary.preview))
+        self.assertEqual(['large 0', 'слово'], dictionary.preview[0])
+        self.assertContains(res, 'large 0 - слово')
+        self.assertNotContains(res, 'large 99')
+
+    def test_ranking(self):
+        """
+        Testing full-text search:
+        - dictionaries matched by title are ranked above ones matched
+        by words, matched by both are shown once
+        - private dictionaries of other users are not found
+        - punctuation of query is not taken as syntax of index
+        """
+        url = reverse('dictionary:dictionary_search')
+        self.add_dictionary('слово', 1)
+        self.add_dictionary('words', 2)
+        private = self.add_dictionary('hidden', 2)
+        private.status = 'private'
+        private.author = get_user_model().objects.create_user('other')
+        private.save()
+
+        res = self.client_auth.get(url, {'query': 'Слово!'})
+        titles = [dictionary.title for dictionary in res.context['page_obj']]
+        self.assertEqual(['слово', 'words'], titles)
+        highlights = res.context['page_obj'][1].highlights
+        self.assertEqual(['words 0', 'words 1'], sorted(
+            word.body for word in highlights
+        ))
+        self.assertContains(res, '<mark>words 0 - слово</mark>')
+        self.assertEqual(2, res.context['page_obj'].paginator.count)
+
+        res = self.client_auth.get(url, {'query': '"*'})
+        self.assertEqual(0, res.context['page_obj'].paginator.count)
+
+    def test_partial_words(self):
+        """
+        Testing beginnings of words find dictionaries like icontains
+        did: by words, by translations and by titles
+        """
+        url = reverse('dictionary:dictionary_search')
+        dictionary = self.add_dictionary('Travel', 0)
+        dictionary.word.add(*Word.objects.bulk_create([
+            Word(body='vacation', translations='отпуск'),
+        ]))
+
+        for query in ('trav', 'vacat', 'отпус', 'VACAT отп'):
+            res = self.client_auth.get(url, {'query': query})
+            titles = [item.title for item in res.context['page_obj']]
+            self.assertEqual(['Travel'], titles, query)
+
+        res = self.client_auth.get(url, {'query': 'travels'})
+        self.assertEqual(0, res.context['page_obj'].paginator.count)
+
+    def test_cache(self):
+        """
+        Testing results are cached:
+        - by normalized query and scope of user
+        - until visible dictionaries are changed
+        """
+        url = reverse('dictionary:dictionary_search')
+        dictionary = self.add_dictionary('cached', 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client_auth.get(url, {'query': 'Cached'})
+        with CaptureQueriesContext(connection) as cached_queries:
+            res = self.client_auth.get(url, {'query': ' cached  '})
+        self.assertLess(len(cached_queries), len(queries))
+        self.assertEqual(1, res.context['page_obj'].paginator.count)
+
+        # private dictionary is visible only for its author
+        self.client_auth.post(
+            reverse('dictionary:change_status'),
+            {'dictionary_pk': dictionary.pk},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        res = self.client_auth.get(url, {'query': 'cached'})
+        self.assertEqual(1, res.context['page_obj'].paginator.count)
+        res = self.client.get(url, {'query': 'cached'})
+        self.assertEqual(0, res.context['page_obj'].paginator.count)
+
+        self.client_auth.post(
+            reverse('dictionary:delete_dictionary'),
+            {'dictionary_pk': dictionary.pk}
+        )
+        res = self.client_auth.get(url, {'query': 'cached'})
+        self.assertEqual(0, res.context['page_obj'].paginator.count)
+
+    def test_stale_cache(self):
+        """
+        Testing dictionaries hidden by other process, whose changes
+        didn't invalidate cache of this one, aren't shown
+        """
+        url = reverse('dictionary:dictionary_search')
+        dictionary = self.add_dictionary('stale', 1)
+        word = dictionary.word.first()
+        res = self.client.get(url, {'query': 'stale'})
+        self.assertEqual(1, len(res.context['page_obj']))
+        res = self.client.get(url, {'query': word.body, 'fuzzy': 'on'})
+        self.assertEqual(1, len(res.context['words']))
+
+        # update() doesn't send signals, as changes of other process
+        Dictionary.objects\
+            .filter(pk=dictionary.pk)\
+            .update(status='private')
+        res = self.client.get(url, {'query': 'stale'})
+        self.assertEqual(0, len(res.context['page_obj']))
+        res = self.client.get(url, {'query': word.body, 'fuzzy': 'on'})
+        self.assertEqual(0, len(res.context['words']))
+
+    def test_fuzzy(self):
+        """
+        Testing fuzzy search finds words with typos:
+        - words are ranked by similarity and have their dictionaries
+        - words of private dictionaries of other users are skipped
+        """
+        url = reverse('dictionary:dictionary_search')
+        dictionary = self.add_dictionary('first', 0)
+        dictionary.word.add(
+            Word.objects.create(body='agriculture', translations='с/х'),
+            Word.objects.create(body='agricultural', translations='с/х'),
+            Word.objects.create(body='culture', translations='культура'),
+        )
+        private = Dictionary.objects.create(
+            title='private',
+            author=get_user_model().objects.create_user('other')
+        )
+        private.word.add(
+            Word.objects.create(body='agricultre', translations='с/х')
+        )
+
+        res = self.client_auth.get(
+            url, {'query': 'agricultre', 'fuzzy': 'on'}
+        )
+        words = res.context['words']
+        self.assertEqual(
+            ['agriculture', 'agricultural'],
+            [result['word'].body for result in words]
+        )
+        self.assertGreater(words[0]['similarity'], words[1]['similarity'])
+        self.assertEqual([dictionary], words[0]['dictionaries'])
+        self.assertContains(res, dictionary.get_absolute_url())
+
+        res = self.client_auth.get(url, {'query': 'культуры', 'fuzzy': 'on'})
+        words = res.context['words']
+        self.assertEqual(['culture'], [res['word'].body for res in words])
+
+
+@override_settings(DICTIONARY_PAGE_SIZE=2)
+class DictionaryList(BaseTestSettings):
+    """
+    Testcase for testing cursor pagination of Dictionary_list view
+    """
+
+    def setUp(self):
+        self.create_additional_user()
+        for title in ('b', 'a', 'c', 'b', 'd'):
+            Dictionary.objects.create(
+                title=title,
+                status='public',
+                author=self.new_auth_user
+            )
+
+    def test_pages(self):
+        """
+        Testing pages follow ordering by (title, id) without gaps
+        and duplicates and nothing is counted
+        """
+        url = reverse('dictionary:list_of_dictionaries')
+        titles = []
+        cursor = None
+        for _ in range(3):
+            payload = {'cursor': cursor} if cursor else {}
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client_auth.get(url, payload)
+            self.assertEqual(200, res.status_code)
+            self.assertFalse(any(
+                'COUNT(' in query['sql'] for query in queries
+            ))
+            titles.extend(
+                dictionary.title for dictionary in res.context['dictionaries']
+            )
+            cursor = res.context['next_cursor']
+        self.assertIsNone(cursor)
+        self.assertEqual(['a', 'b', 'b', 'c', 'd'], titles)
+
+        res = self.client_auth.get(url, {'cursor': 'broken'})
+        self.assertEqual(404, res.status_code)
+
+    def test_fragment(self):
+        """
+        Testing infinite scroll request gets only items of the page
+        and link to the next page in header
+        """
+        url = reverse('dictionary:list_of_dictionaries')
+        res = self.client_auth.get(url)
+        next_page_url = res.context['next_page_url']
+        self.assertContains(res, '<html')
+
+        res = self.client_auth.get(
+            url + next_page_url,
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(200, res.status_code)
+        self.assertNotContains(res, '<html')
+        self.assertContains(res, 'infinite-item', count=2)
+        self.assertContains(res, 'infinite-more-link')
+        self.assertEqual(res.context['next_page_url'], res['X-Next-Page'])
+        self.assertIn('X-Requested-With', res['Vary'])
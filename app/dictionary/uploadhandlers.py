@@ -0,0 +1,41 @@
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler
+)
+
+
+class ContentHashMixin:
+    """
+    Mixin for upload handlers, calculates sha256 of uploaded file
+    while its chunks are received and keeps it in file.content_hash
+    """
+    def new_file(self, *args, **kwargs):
+        # parent may raise StopFutureHandlers, so hasher goes first
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(
+    ContentHashMixin,
+    MemoryFileUploadHandler
+):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(
+    ContentHashMixin,
+    TemporaryFileUploadHandler
+):
+    pass
@@ -7,9 +7,12 @@ from .views import (
     remove_dictionary,
     change_status,
     delete_dictionary,
-    dictionary_search
+    replace_file,
+    dictionary_search,
+    import_job_status,
+    autocomplete
 )
-from .views import AddDictionaryView
+from .views import AddArchiveView, AddDictionaryView
 
 
 app_name = 'dictionary'
@@ -30,6 +33,16 @@ urlpatterns = [
         AddDictionaryView.as_view(),
         name='upload_file'
     ),
+    path(
+        'upload/archive/',
+        AddArchiveView.as_view(),
+        name='upload_archive'
+    ),
+    path(
+        'upload/<int:pk>/',
+        import_job_status,
+        name='import_job_status'
+    ),
     path(
         '<int:pk>/',
         Dictionary_detail.as_view(),
@@ -56,9 +69,19 @@ urlpatterns = [
         delete_dictionary,
         name='delete_dictionary'
     ),
+    path(
+        'replace_file/',
+        replace_file,
+        name='replace_file'
+    ),
     path(
         'search/',
         dictionary_search,
         name='dictionary_search'
     ),
+    path(
+        'search/autocomplete/',
+        autocomplete,
+        name='autocomplete'
+    ),
 ]
@@ -1,23 +1,34 @@
 import json
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseRedirect, HttpResponse
+from django.core.paginator import Paginator
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.decorators.http import require_POST
-from django.views.generic import ListView, DetailView, CreateView
+from django.views.generic import ListView, DetailView, CreateView, FormView
 from django.views.generic.edit import FormMixin
-from django.db.models import Q
 
+from dictionary.autocomplete import index as autocomplete_index
 from dictionary.decorators import author_required, ajax_required
 from dictionary.forms import (
+    ArchiveForm,
     ChoiceDictionaryForm,
     DictionaryForm,
+    ReplaceFileForm,
     SearchForm
 )
-from dictionary.models import Dictionary
+from dictionary.loaders import get_loader
+from dictionary.models import Dictionary, ImportJob
+from dictionary.pagination import (
+    CursorPaginationMixin,
+    FragmentResponseMixin
+)
+from dictionary.permissions import is_student
+from dictionary.search import SearchResults, fuzzy_search
 
 
 @login_required
@@ -66,17 +77,19 @@ def change_status(request):
     - private ones available only its author
     - public ones available for all
     """
-    dictionary_pk = request.POST.get('dictionary_pk')
-    dictionary = get_object_or_404(Dictionary, pk=dictionary_pk)
+    # dictionary is loaded and checked by author_required
+    dictionary = get_loader(request).dictionary(
+        request.POST.get('dictionary_pk')
+    )
     form = ChoiceDictionaryForm(request.POST)
     response_data = {}
     if form.is_valid():
         if dictionary.status == 'private':
             dictionary.status = 'public'
-            dictionary.save()
         else:
             dictionary.status = 'private'
-            dictionary.save()
+        # counters and preview are kept up to date by separate UPDATEs
+        dictionary.save(update_fields=['status'])
         response_data['action_status'] = 'success'
         response_data['msg'] = 'Статус словаря успешно изменен'
     else:
@@ -99,8 +112,10 @@ def delete_dictionary(request):
     Function deletes the dictionary and redirect
     user to the list of dictionaries
     """
-    dictionary_pk = request.POST.get('dictionary_pk')
-    dictionary = get_object_or_404(Dictionary, pk=dictionary_pk)
+    # dictionary is loaded and checked by author_required
+    dictionary = get_loader(request).dictionary(
+        request.POST.get('dictionary_pk')
+    )
     form = ChoiceDictionaryForm(request.POST)
     if form.is_valid():
         dictionary.delete()
@@ -110,24 +125,52 @@ def delete_dictionary(request):
     return redirect('dictionary:my_dictionaries')
 
 
-class Dictionary_list(ListView):
+@login_required
+@require_POST
+@author_required
+def replace_file(request):
+    """
+    Function updates words of dictionary by new version of its file,
+    only changed words are touched and progress of lessons is kept
+    """
+    dictionary_pk = request.POST.get('dictionary_pk')
+    form = ReplaceFileForm(request.POST, request.FILES)
+    if form.is_valid():
+        inserted, updated, removed = form.save()
+        messages.success(
+            request,
+            f'Словарь обновлен: добавлено слов {inserted}, '
+            f'изменено {updated}, удалено {removed}'
+        )
+    else:
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+    return redirect('lesson:lesson', request.user.pk, dictionary_pk)
+
+
+class Dictionary_list(FragmentResponseMixin, CursorPaginationMixin, ListView):
     """
     View render list all public dictionaries which user is not
     author or student
     """
     model = Dictionary
-    paginate_by = 1
     template_name = "dictionary/list.html"
+    item_template_name = "dictionary/list_item.html"
     context_object_name = 'dictionaries'
 
     def get_queryset(self):
         return Dictionary.detail_objects.get_available(self.request.user)
 
 
-class My_dictionary_list(LoginRequiredMixin, ListView):
+class My_dictionary_list(
+    LoginRequiredMixin,
+    FragmentResponseMixin,
+    CursorPaginationMixin,
+    ListView
+):
     model = Dictionary
-    paginate_by = 1
     template_name = "dictionary/my_dictionaries.html"
+    item_template_name = "dictionary/my_dictionaries_item.html"
     context_object_name = 'dictionaries'
 
     def get_queryset(self):
@@ -142,10 +185,13 @@ class Dictionary_detail(FormMixin, DetailView):
     form_class = ChoiceDictionaryForm
     template_name = "dictionary/detail.html"
     context_object_name = 'dictionary'
-    queryset = Dictionary.detail_objects.all()
+    queryset = Dictionary.objects\
+        .select_related('author')\
+        .prefetch_related('word')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['is_student'] = is_student(self.request.user, self.object.pk)
         context['student_form'] = ChoiceDictionaryForm(
             initial={'dictionary_pk': self.object.pk}
         )
@@ -170,39 +216,121 @@ class AddDictionaryView(LoginRequiredMixin, CreateView):
         self.initial.update({'author': self.request.user})
         return self.initial
 
+    def get_context_data(self, **kwargs):
+        """
+        Adding queued import job to render its progress
+        """
+        context = super().get_context_data(**kwargs)
+        job_pk = self.request.GET.get('job')
+        if job_pk and job_pk.isdigit():
+            context['job'] = ImportJob.objects.filter(
+                pk=job_pk,
+                author=self.request.user
+            ).first()
+        return context
+
     def form_valid(self, form):
         """
-        in case of exceptions while parsing file we redirect back
-        with error message
+        file is parsed while saving, unrecognized file is shown as
+        error of the form, files uploaded in background are queued
+        and user is redirected back to watch the progress
         """
+        if form.cleaned_data.get('background'):
+            job = form.save_job()
+            messages.info(
+                self.request,
+                'Словарь поставлен в очередь на загрузку'
+            )
+            return redirect(
+                reverse('dictionary:upload_file') + f'?job={job.pk}'
+            )
         self.object = form.save()
         if not self.object:
-            messages.error(
+            # file is validated while it's saved
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AddArchiveView(LoginRequiredMixin, FormView):
+    """
+    View which handling creating dictionaries from all files
+    of uploaded zip archive
+    """
+    form_class = ArchiveForm
+    template_name = 'dictionary/upload_archive.html'
+    success_url = reverse_lazy('dictionary:my_dictionaries')
+
+    def form_valid(self, form):
+        dictionaries = form.save(self.request.user)
+        messages.success(
+            self.request,
+            f'Загружено словарей: {len(dictionaries)}'
+        )
+        skipped = form.archive_manager.skipped
+        if skipped:
+            messages.warning(
                 self.request,
-                'Что-то пошло не так, повторите попытку'
+                'Не были распознаны файлы: ' + ', '.join(skipped)
             )
-            return redirect('dictionary:upload_file')
         return HttpResponseRedirect(self.get_success_url())
 
 
+@login_required
+def import_job_status(request, pk):
+    """
+    Function returns progress of import job of request.user
+    """
+    job = get_object_or_404(ImportJob, pk=pk, author=request.user)
+    response_data = {
+        'status': job.status,
+        'cards_parsed': job.cards_parsed,
+        'cards_inserted': job.cards_inserted,
+        'error': job.error,
+        'success_url': reverse('dictionary:my_dictionaries'),
+    }
+    return JsonResponse(response_data)
+
+
 def dictionary_search(request):
+    """
+    Full-text search of dictionaries by titles and words, results
+    are ranked and paginated for infinite scroll;
+    fuzzy search returns similar words with their dictionaries
+    """
     form = SearchForm()
     query = None
-    results = []
+    page_obj = None
+    words = None
     if 'query' in request.GET:
         form = SearchForm(request.GET)
         if form.is_valid():
             query = form.cleaned_data['query']
-            results = Dictionary.objects.filter(
-                Q(author=request.user.id) | (Q(status='public'))).\
-                filter(
-                Q(
-                    title__icontains=query
-                ) | (Q(
-                    word__body__icontains=query
-                )) | (Q(
-                    word__translations__icontains=query
-                ))
-            ).distinct()
-    return render(request, 'dictionary/search.html',
-                  {'form': form, 'query': query, 'results': results})
+            if form.cleaned_data['fuzzy']:
+                words = fuzzy_search(query, request.user)
+            else:
+                paginator = Paginator(
+                    SearchResults(query, request.user),
+                    settings.DICTIONARY_PAGE_SIZE
+                )
+                page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'dictionary/search.html', {
+        'form': form,
+        'query': query,
+        'page_obj': page_obj,
+        'words': words,
+    })
+
+
+def autocomplete(request):
+    """
+    Function returns words starting with prefix for typeahead of
+    search box, words are taken from in-process index, not from DB
+    """
+    prefix = request.GET.get('query', '').strip()
+    results = []
+    if prefix:
+        results = [
+            {'body': body, 'translations': translations}
+            for body, translations in autocomplete_index.search(prefix, 10)
+        ]
+    return JsonResponse({'results': results})
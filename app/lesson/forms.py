@@ -1,4 +1,5 @@
 from django import forms
+from dictionary.models import Word
 from lesson.models import Lesson, Card
 
 QUANTITY_CHOICES = [(i, str(i)) for i in range(1, 11)]
@@ -11,8 +12,18 @@ STATUS_CHOICES = (
 
 
 class LearnForm(forms.Form):
+    """
+    Form of answer, card of lazy lesson which isn't saved yet
+    is identified by word_pk
+    """
     card_pk = forms.ModelChoiceField(
         queryset=Card.objects.all(),
+        required=False,
+        widget=forms.HiddenInput,
+    )
+    word_pk = forms.ModelChoiceField(
+        queryset=Word.objects.all(),
+        required=False,
         widget=forms.HiddenInput,
     )
     translations = forms.CharField(
@@ -59,6 +70,18 @@ class ChangeCardStatus(forms.Form):
     )
     card_pk = forms.ModelChoiceField(
         queryset=Card.objects.all(),
+        required=False,
+        widget=forms.HiddenInput,
+    )
+    # card of lazy lesson which isn't saved yet
+    lesson_pk = forms.ModelChoiceField(
+        queryset=Lesson.objects.all(),
+        required=False,
+        widget=forms.HiddenInput,
+    )
+    word_pk = forms.ModelChoiceField(
+        queryset=Word.objects.all(),
+        required=False,
         widget=forms.HiddenInput,
     )
     back_url = forms.CharField(
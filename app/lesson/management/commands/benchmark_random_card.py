@@ -0,0 +1,122 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from dictionary.models import Dictionary, Word
+from lesson.models import Card, Lesson
+
+
+def load_all(lesson, visited):
+    """
+    Pick as it was made by get_random() before: all active cards
+    are loaded with words and one is chosen in Python
+    """
+    cards = lesson.get_active_cards().exclude(id__in=visited)
+    if len(cards) > 0:
+        return random.choice(cards), len(cards) > 1
+    return None, False
+
+
+def seek(lesson, visited):
+    return lesson.get_random(visited)
+
+
+STRATEGIES = {
+    'load-all': load_all,
+    'seek': seek,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill DB with lessons of synthetic dictionaries and compare wall '
+        'time and number of queries of picking a random card by loading '
+        'all active cards and by seek of random sort key in index, all '
+        'data is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[100, 1000, 10000, 100000],
+            help='Number of active cards in lessons',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of picks of each lesson, the mean is reported',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username='benchmark_random_card'
+            )
+            self.stdout.write(
+                f'{"strategy":>10} {"cards":>8} {"time, ms":>10} '
+                f'{"queries":>8}'
+            )
+            for size in options['sizes']:
+                lesson = self.fill(user, size)
+                for name, strategy in STRATEGIES.items():
+                    wall_time, queries = self.measure(
+                        strategy, lesson, options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{name:>10} {size:>8} {wall_time * 1000:>10.2f} '
+                        f'{queries:>8}'
+                    )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def fill(user, size):
+        """
+        Create dictionary of size words and lesson with their cards
+        """
+        dictionary = Dictionary.objects.create(
+            title=f'Benchmark {size}',
+            slug=f'benchmark-{size}',
+            author=user
+        )
+        words = Word.objects.bulk_create(
+            (
+                Word(body=f'word {i}', translations=f'слово {i}')
+                for i in range(size)
+            ),
+            batch_size=Lesson.cards_batch_size,
+        )
+        Dictionary.word.through.objects.bulk_create(
+            (
+                Dictionary.word.through(dictionary=dictionary, word=word)
+                for word in words
+            ),
+            batch_size=Lesson.cards_batch_size,
+        )
+        lesson = Lesson.objects.create(dictionary=dictionary, student=user)
+        lesson.create_cards()
+        return lesson
+
+    @staticmethod
+    def measure(strategy, lesson, repeat):
+        """
+        Return mean wall time and number of queries of one pick,
+        visited cards are kept between picks as in LearnDetailView
+        """
+        visited = []
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                card, _ = strategy(lesson, visited)
+                if isinstance(card, Card):
+                    visited.append(
+                        card.pk if strategy is load_all else card.word_id
+                    )
+            wall_time = time.perf_counter() - start
+        return wall_time / repeat, len(queries) // repeat
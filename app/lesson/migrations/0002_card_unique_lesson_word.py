@@ -0,0 +1,40 @@
+# Generated by Django 4.0 on 2026-10-18 06:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_cards(apps, schema_editor):
+    """
+    Keep one card of every (lesson, word), the one with the most
+    attempts, so progress of lessons is kept
+    """
+    Card = apps.get_model('lesson', 'Card')
+    duplicates = Card.objects\
+        .values('lesson', 'word')\
+        .annotate(total=Count('id'))\
+        .filter(total__gt=1)\
+        .order_by()
+    for duplicate in duplicates.iterator():
+        cards = Card.objects\
+            .filter(lesson=duplicate['lesson'], word=duplicate['word'])\
+            .order_by('-all_attempts', 'pk')\
+            .values_list('pk', flat=True)
+        Card.objects.filter(pk__in=list(cards[1:])).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_cards, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='card',
+            constraint=models.UniqueConstraint(fields=('lesson', 'word'), name='unique_lesson_word'),
+        ),
+    ]
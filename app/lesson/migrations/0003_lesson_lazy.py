@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0002_card_unique_lesson_word'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='lazy',
+            field=models.BooleanField(default=False),
+        ),
+    ]
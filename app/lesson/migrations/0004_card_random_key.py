@@ -0,0 +1,42 @@
+# Generated by Django 4.0 on 2026-10-18 07:04
+
+import random
+from itertools import islice
+
+from django.db import migrations, models
+import lesson.models
+
+
+def set_random_keys(apps, schema_editor):
+    """
+    Default is evaluated once for existing rows by AddField, keys are
+    generated in Python in batches: RANDOM() of SQLite isn't in [0, 1)
+    """
+    Card = apps.get_model('lesson', 'Card')
+    pks = Card.objects.order_by('pk').values_list('pk', flat=True)
+    pks = pks.iterator()
+    while chunk := list(islice(pks, 1000)):
+        Card.objects.bulk_update(
+            [Card(pk=pk, random_key=random.random()) for pk in chunk],
+            ['random_key']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0003_lesson_lazy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='random_key',
+            field=models.FloatField(default=lesson.models.random_key, editable=False),
+        ),
+        migrations.RunPython(set_random_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['lesson', 'status', 'random_key'], name='lesson_card_lesson__bd91d6_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.db import models
-from dictionary.models import Dictionary, Word
+from django.db.models import Exists, OuterRef
+from dictionary.models import Dictionary, Word, random_key
 from django.urls import reverse
 from django.core.validators import (
     MaxValueValidator,
@@ -26,6 +27,11 @@ class Lesson(models.Model):
         ]
     )
     created = models.DateTimeField(auto_now_add=True)
+    # untouched words of lazy lesson are implicit active cards,
+    # see get_cards()
+    lazy = models.BooleanField(default=False)
+
+    cards_batch_size = 1000
 
     class Meta:
         ordering = ('created',)
@@ -44,10 +50,55 @@ class Lesson(models.Model):
 
     def create_cards(self):
         """
-        Creating new cards when lesson first time rendered
+        Creating new cards when lesson first time rendered:
+            - cards are inserted in batches without loading words
+            - cards which already exist are skipped by the unique
+            constraint, so parallel requests don't make duplicates
+            - lazy lesson has no cards until words are answered
+        """
+        if self.lazy:
+            return
+        word_ids = Dictionary.word.through.objects\
+            .filter(dictionary=self.dictionary_id)\
+            .values_list('word_id', flat=True)
+        Card.objects.bulk_create(
+            (Card(lesson=self, word_id=pk) for pk in word_ids.iterator()),
+            batch_size=self.cards_batch_size,
+            ignore_conflicts=True,
+        )
+
+    def get_untouched_words(self):
+        """
+        The function returns QuerySet of words of dictionary which have
+        no cards in the lesson, they are active cards of lazy lesson
+        """
+        cards = Card.objects.filter(lesson=self, word=OuterRef('pk'))
+        return self.dictionary.word.filter(~Exists(cards))
+
+    def get_cards(self):
+        """
+        The function returns list of all cards of the lesson, cards of
+        untouched words of lazy lesson aren't saved
+        """
+        cards = list(Card.objects.filter(lesson=self).select_related('word'))
+        if self.lazy:
+            cards.extend(
+                Card(lesson=self, word=word)
+                for word in self.get_untouched_words()
+            )
+        return cards
+
+    def get_card(self, word):
+        """
+        The function returns card of the word or None if word isn't in
+        dictionary, card of lazy lesson is saved by check_card() or
+        change_status() on the first answer or change of status
         """
-        for word in self.dictionary.word.all():
-            Card.objects.get_or_create(word=word, lesson=self)
+        card = Card.objects.filter(lesson=self, word=word).first()
+        if card is None and self.lazy:
+            if self.dictionary.word.filter(pk=word.pk).exists():
+                card = Card(lesson=self, word=word)
+        return card
 
     def get_active_cards(self):
         """
@@ -58,32 +109,81 @@ class Lesson(models.Model):
             .select_related('word')
         return qs
 
+    def has_active_cards(self):
+        """
+        The function returns True if there is active cards to learn
+        """
+        if self.get_active_cards().exists():
+            return True
+        return self.lazy and self.get_untouched_words().exists()
+
     def get_random(self, visited=None):
         """
-        The function returns random not visited card
+        The function returns random active card with word not visited
+        and True if there are other such cards:
+            - card is sought by random sort key in index, so only one
+            row is read however many cards there are
+            - lazy lesson chooses between active cards and untouched
+            words by their numbers, untouched word is sought by random
+            sort key of its link to dictionary in the same way
         """
         if not visited:
             visited = []
+        cards = self.get_active_cards().exclude(word_id__in=visited)
+        if not self.lazy:
+            card = self.seek_card(cards)
         else:
-            visited = visited[:]
-        cards = self.get_active_cards().exclude(id__in=visited)
-        if len(cards) > 1:
-            return random.choice(cards), True
-        elif len(cards) > 0:
-            return random.choice(cards), False
-        return None, False
+            # cards of lazy lesson are only answered words, so they
+            # are cheap to count
+            active = cards.count()
+            untouched = self.dictionary.word_count - self.card_set.count()
+            card = None
+            if random.randrange(max(active + untouched, 1)) >= active:
+                card = self.seek_untouched_card(visited)
+            card = card or self.seek_card(cards)
+            card = card or self.seek_untouched_card(visited)
+        if card is None:
+            return None, False
+        return card, self.get_next(card, visited)
+
+    @staticmethod
+    def seek_card(cards):
+        """
+        The function returns row of queryset (card or link of word to
+        dictionary) with the nearest random_key to a random value
+        """
+        key = random.random()
+        return cards.filter(random_key__gte=key)\
+            .order_by('random_key').first() or \
+            cards.order_by('random_key').first()
+
+    def seek_untouched_card(self, visited):
+        cards = Card.objects.filter(lesson=self, word=OuterRef('word'))
+        links = Dictionary.word.through.objects\
+            .filter(dictionary=self.dictionary_id)\
+            .filter(~Exists(cards))\
+            .exclude(word_id__in=visited)\
+            .select_related('word')
+        link = self.seek_card(links)
+        return link and Card(lesson=self, word=link.word)
 
     def get_next(self, card, visited=None):
         """
-        The function returns True if there is unvisited cards or False
+        The function returns True if there is active cards with words
+        not visited or False
         """
         if not visited:
             visited = []
         else:
             visited = visited[:]
-        visited.append(card.pk)
-        qs = self.get_active_cards().exclude(id__in=visited).count()
-        return qs != 0
+        visited.append(card.word_id)
+        if self.get_active_cards().exclude(word_id__in=visited).exists():
+            return True
+        if self.lazy:
+            return self.get_untouched_words()\
+                .exclude(pk__in=visited)\
+                .exists()
+        return False
 
 
 class Card(models.Model):
@@ -111,9 +211,18 @@ class Card(models.Model):
     )
     all_attempts = models.IntegerField(default=0)
     all_correct_answers = models.IntegerField(default=0)
+    random_key = models.FloatField(default=random_key, editable=False)
 
     class Meta:
         ordering = ('created',)
+        # random active card is sought by random_key, see get_random()
+        indexes = [models.Index(fields=('lesson', 'status', 'random_key'))]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('lesson', 'word'),
+                name='unique_lesson_word',
+            ),
+        ]
 
     def __str__(self):
         return self.word.body
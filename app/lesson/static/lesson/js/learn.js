@@ -65,6 +65,7 @@ function get_next_card(url) {
                 if (action_status != 'danger') {
                     var next_card = data['next_card'];
                     var card_pk = data['card_pk'];
+                    var word_pk = data['word_pk'];
                     var reverse = data['reverse'];
                     var card = JSON.parse(data['card']);
                     $('#check_card_btn').show();
@@ -84,6 +85,7 @@ function get_next_card(url) {
                             );
                     };
                     $('#id_card_pk').val(card_pk);
+                    $('#id_word_pk').val(word_pk);
                     $('#id_body').show();
                 }
             } else {
@@ -108,10 +110,12 @@ $(document).ready(function() {
     $('#check_card').on('submit', function(event){
         event.preventDefault();
         var card_pk = $('#id_card_pk').val();
+        var word_pk = $('#id_word_pk').val();
         var translations = $('#id_translations').val();
         var body = $('#id_body').val();
         var data = {
             'card_pk': card_pk,
+            'word_pk': word_pk,
             'translations': translations,
             'body': body,
         };
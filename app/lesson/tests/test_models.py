@@ -0,0 +1,218 @@
+from django.db import IntegrityError, connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.base_settings import BaseTestSettings
+from dictionary.helpers import DictionaryFileManager
+from dictionary.models import Word
+from lesson.models import Card, Lesson
+
+
+class TestCreateCards(BaseTestSettings):
+    """
+    Testcase for testing creating cards of lessons
+    """
+    def setUp(self):
+        self.create_dictionary()
+        self.new_dict.word.add(*Word.objects.bulk_create(
+            Word(body=f'word {i}', translations=f'слово {i}')
+            for i in range(20)
+        ))
+        self.lesson = Lesson.objects.create(
+            dictionary=self.new_dict,
+            student=self.user_auth
+        )
+
+    def test_create_cards(self):
+        """
+        Testing cards are created by constant number of queries,
+        repeated call doesn't make duplicates
+        """
+        # ids of words and one insert per batch
+        with self.assertNumQueries(2):
+            self.lesson.create_cards()
+        self.assertEqual(21, Card.objects.filter(lesson=self.lesson).count())
+
+        self.lesson.create_cards()
+        self.assertEqual(21, Card.objects.filter(lesson=self.lesson).count())
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Card.objects.create(lesson=self.lesson, word=self.new_word)
+
+    def test_move_cards(self):
+        """
+        Testing moved card is deleted if lesson has card of new word
+        """
+        self.lesson.create_cards()
+        first, second = self.new_dict.word.order_by('pk')[:2]
+        Card.objects.filter(lesson=self.lesson, word=first)\
+            .update(correct_answers=3)
+        cards = Card.objects.filter(lesson=self.lesson)
+
+        DictionaryFileManager.move_cards(cards, {second.pk: first.pk})
+        self.assertEqual(20, cards.count())
+        self.assertEqual(3, cards.get(word=first).correct_answers)
+        self.assertFalse(cards.filter(word=second).exists())
+
+
+class TestLazyLesson(BaseTestSettings):
+    """
+    Testcase for testing lessons with cards created on the first answer
+    """
+    def setUp(self):
+        self.create_dictionary()
+        self.new_dict.word.add(*Word.objects.bulk_create(
+            Word(body=f'word {i}', translations=f'слово {i}')
+            for i in range(4)
+        ))
+        self.new_dict.update_counters()
+
+    def test_lesson_view(self):
+        """
+        Testing lesson of large dictionary has no cards, untouched
+        words are shown and learned as active cards
+        """
+        url = reverse(
+            'lesson:lesson',
+            kwargs={
+                'user_pk': self.user_auth.pk,
+                'dictionary_pk': self.new_dict.pk
+            }
+        )
+        with override_settings(LESSON_LAZY_WORD_COUNT=5):
+            self.client_auth.get(url)
+        lesson = Lesson.objects.get(dictionary=self.new_dict)
+        self.assertTrue(lesson.lazy)
+        self.assertFalse(Card.objects.filter(lesson=lesson).exists())
+
+        res = self.client_auth.get(url)
+        self.assertEqual(5, len(res.context['lesson'].cards))
+        self.assertTrue(lesson.has_active_cards())
+
+    def test_answer(self):
+        """
+        Testing card is saved on the first answer or change of status
+        """
+        lesson = Lesson.objects.create(
+            dictionary=self.new_dict,
+            student=self.user_auth,
+            lazy=True
+        )
+        card, next_card = lesson.get_random()
+        self.assertIsNone(card.pk)
+        self.assertTrue(next_card)
+
+        self.client_auth.post(
+            reverse('lesson:learn', kwargs={'lesson_pk': lesson.pk}),
+            {'word_pk': card.word_id, 'body': card.word.body},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        card = Card.objects.get(lesson=lesson, word=card.word)
+        self.assertEqual(1, card.correct_answers)
+        self.assertEqual(4, lesson.get_untouched_words().count())
+
+        word = lesson.get_untouched_words().first()
+        self.client_auth.post(reverse('lesson:change_card_status'), {
+            'lesson_pk': lesson.pk,
+            'word_pk': word.pk,
+            'status': 'disable',
+            'back_url': '/'
+        })
+        self.assertEqual(
+            'disable', Card.objects.get(lesson=lesson, word=word).status
+        )
+
+        # all words are visited
+        visited = list(self.new_dict.word.values_list('pk', flat=True))
+        self.assertEqual((None, False), lesson.get_random(visited))
+        self.assertFalse(lesson.get_next(card, visited))
+
+
+class TestRandomCard(BaseTestSettings):
+    """
+    Testcase for testing random choice of cards
+    """
+    def setUp(self):
+        self.create_dictionary()
+        self.new_dict.word.add(*Word.objects.bulk_create(
+            Word(body=f'word {i}', translations=f'слово {i}')
+            for i in range(9)
+        ))
+        self.new_dict.update_counters()
+
+    def pick_all(self, lesson):
+        """
+        Take random cards until all are visited, return their words
+        """
+        visited = []
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                card, next_card = lesson.get_random(visited)
+            # seeks with fallbacks, not a query per card
+            self.assertLessEqual(len(queries), 10)
+            if card is None:
+                return visited
+            self.assertNotIn(card.word_id, visited)
+            visited.append(card.word_id)
+            self.assertEqual(next_card, lesson.get_next(card, visited[:-1]))
+
+    def test_get_random(self):
+        """
+        Testing every active card is taken once until all are visited
+        """
+        lesson = Lesson.objects.create(
+            dictionary=self.new_dict,
+            student=self.user_auth
+        )
+        lesson.create_cards()
+        Card.objects.filter(lesson=lesson, word=self.new_word)\
+            .update(status='done')
+
+        visited = self.pick_all(lesson)
+        self.assertEqual(9, len(visited))
+        self.assertNotIn(self.new_word.pk, visited)
+
+    def test_get_random_lazy(self):
+        """
+        Testing lazy lesson takes active cards and untouched words
+        """
+        lesson = Lesson.objects.create(
+            dictionary=self.new_dict,
+            student=self.user_auth,
+            lazy=True
+        )
+        first, second = self.new_dict.word.order_by('pk')[:2]
+        Card.objects.create(lesson=lesson, word=first, status='done')
+        Card.objects.create(lesson=lesson, word=second)
+
+        visited = self.pick_all(lesson)
+        self.assertEqual(9, len(visited))
+        self.assertIn(second.pk, visited)
+        self.assertNotIn(first.pk, visited)
+
+    def test_get_random_lazy_sparse_words(self):
+        """
+        Testing untouched words are taken evenly when ids of words of
+        dictionary are sparse, as canonical words are shared
+        """
+        lesson = Lesson.objects.create(
+            dictionary=self.new_dict,
+            student=self.user_auth,
+            lazy=True
+        )
+        Card.objects.filter(lesson=lesson).delete()
+        self.new_dict.word.clear()
+        first = Word.objects.create(body='first', translations='первое')
+        Word.objects.bulk_create(
+            Word(body=f'other {i}', translations=f'другое {i}')
+            for i in range(100)
+        )
+        last = Word.objects.create(body='last', translations='последнее')
+        self.new_dict.word.add(first, last)
+
+        picked = [
+            lesson.seek_untouched_card([]).word_id for _ in range(200)
+        ]
+        self.assertGreater(picked.count(first.pk), 50)
+        self.assertGreater(picked.count(last.pk), 50)
@@ -1,9 +1,10 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.core import serializers
 
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils.decorators import method_decorator
@@ -14,15 +15,17 @@ from django.views.generic import FormView, DetailView
 from django.views.generic.detail import SingleObjectMixin
 
 from dictionary.decorators import available_for_learning
-from dictionary.forms import ChoiceDictionaryForm
+from dictionary.forms import ChoiceDictionaryForm, ReplaceFileForm
+from dictionary.loaders import get_loader
+from dictionary.permissions import is_student
 
 from lesson.forms import (
     ChangeNumberAnswersForm,
     ChangeCardStatus,
     LearnForm,
 )
+from dictionary.models import Word
 from lesson.models import Lesson, Card
-from dictionary.models import Dictionary
 
 
 class JSONResponseMixin:
@@ -52,6 +55,7 @@ class JSONResponseMixin:
         context.pop('form')
         context['card'] = card
         context['card_pk'] = self.card.pk
+        context['word_pk'] = self.card.word_id
         return context
 
 
@@ -113,6 +117,16 @@ class BaseLearnView(JSONResponseMixin, HTMLResponseMixin, SingleObjectMixin):
         self.reverse = kwargs.get('reverse', None)
         super().setup(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        """
+        Lesson is taken from loader of request, where it's put by
+        available_for_learning
+        """
+        lesson = get_loader(self.request).lesson(self.kwargs['lesson_pk'])
+        if lesson is None:
+            raise Http404
+        return lesson
+
     def get_context_data(self, **kwargs):
         """
         Method prepares common context for both HTML and JSON responses
@@ -162,19 +176,21 @@ class LearnFormView(BaseLearnView, FormView):
     form_class = LearnForm
 
     def post(self, request, *args, **kwargs):
-        self.card = get_object_or_404(
-            Card.objects.select_related(
-                'lesson',
-                'word',
-                'lesson__dictionary'
-            ),
-            pk=request.POST.get('card_pk')
-        )
+        loader = get_loader(request)
+        if request.POST.get('card_pk'):
+            self.card = loader.card(request.POST['card_pk'])
+        else:
+            # card of lazy lesson may be not saved yet
+            lesson = loader.lesson(self.kwargs['lesson_pk'])
+            word = loader.word(request.POST.get('word_pk'))
+            self.card = lesson.get_card(word) if lesson and word else None
+        if self.card is None:
+            raise Http404
         self.object = self.card.lesson
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form):
-        self.visited.append(self.card.pk)
+        self.visited.append(self.card.word_id)
         cd = form.cleaned_data
         answer = cd['body'].lower() or cd['translations'].lower()
         status, msg = self.card.check_card(answer, self.reverse)
@@ -213,7 +229,7 @@ class LearnDetailView(BaseLearnView, DetailView):
         if not self.card:
             self.visited.clear()
             request.session.modified = True
-            if not self.object.get_active_cards():
+            if not self.object.has_active_cards():
                 context = {
                     'status': 'danger',
                     'msg': 'В выбранном словаре нет активных карточек, '
@@ -227,6 +243,7 @@ class LearnDetailView(BaseLearnView, DetailView):
         form = LearnForm(
             initial={
                 'card_pk': self.card.pk,
+                'word_pk': self.card.word_id,
             },
         )
         if self.reverse:
@@ -247,7 +264,20 @@ def change_card_status(request):
     """
     card_pk = request.POST.get('card_pk')
     back_url = request.POST.get('back_url')
-    card = get_object_or_404(Card, pk=card_pk)
+    if card_pk:
+        card = get_object_or_404(Card, pk=card_pk)
+    else:
+        # card of lazy lesson is saved by change_status()
+        lesson = get_object_or_404(
+            Lesson,
+            pk=request.POST.get('lesson_pk'),
+            student=request.user
+        )
+        card = lesson.get_card(
+            get_object_or_404(Word, pk=request.POST.get('word_pk'))
+        )
+        if card is None:
+            raise Http404
     form = ChangeCardStatus(request.POST)
     if form.is_valid():
         new_status = form.cleaned_data['status']
@@ -305,26 +335,28 @@ def lesson(request, dictionary_pk, user_pk):
     - added to context form to change number of answers;
     - added to context form to change status of card
     """
-    dictionary = Dictionary.objects.\
-        select_related('author'). \
-        get(pk=dictionary_pk)
+    dictionary = get_loader(request).dictionary(dictionary_pk)
 
     current_lesson, created = Lesson.objects.get_or_create(
         dictionary=dictionary,
         student=request.user,
+        defaults={
+            'lazy': dictionary.word_count >= settings.LESSON_LAZY_WORD_COUNT
+        },
     )
 
     if created:
         current_lesson.create_cards()
 
-    current_lesson.cards = Card.objects.filter(lesson=current_lesson).\
-        select_related('word', 'lesson')
+    current_lesson.cards = current_lesson.get_cards()
 
     for card in current_lesson.cards:
         card.form_card = ChangeCardStatus(
             initial={
                 'status': card.status,
                 'card_pk': card.pk,
+                'lesson_pk': current_lesson.pk,
+                'word_pk': card.word_id,
                 'back_url': request.path
             }
         )
@@ -333,6 +365,11 @@ def lesson(request, dictionary_pk, user_pk):
             'dictionary_pk': dictionary,
         }
     )
+    replace_file_form = ReplaceFileForm(
+        initial={
+            'dictionary_pk': dictionary,
+        }
+    )
     form_answers = ChangeNumberAnswersForm(
         initial={
             'required_answers': current_lesson.required_answers,
@@ -342,9 +379,11 @@ def lesson(request, dictionary_pk, user_pk):
 
     context = dict(
         dictionary=dictionary,
+        is_student=is_student(request.user, dictionary.pk),
         lesson=current_lesson,
         form_answers=form_answers,
         dictionary_form=dictionary_form,
+        replace_file_form=replace_file_form,
     )
 
     return render(request, 'lesson.html', context=context)